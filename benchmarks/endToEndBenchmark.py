@@ -0,0 +1,181 @@
+"""Measure restock-to-detection, detection-to-cart and detection-to-pay-click latency and sweep throughput.
+
+Runs the checker's own polling, cart and checkout code against the local
+Shopify stand-in (benchmarks/shopifyStandIn.py): products are restocked on a
+schedule while the poll loop runs, then whole-watchlist sweeps are timed as the
+watchlist grows. Pay-click latency needs Chrome and is only measured with --checkout.
+
+Usage: python benchmarks/endToEndBenchmark.py [--restocks N] [--interval SECONDS] [--sizes 10,100,500] [--checkout]
+"""
+import argparse
+import logging
+import os
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from productChecker.checkoutQueue import CheckoutQueue
+from productChecker.pollScheduler import PollScheduler
+from shopifyStandIn import StandInStore, start_stand_in
+
+SHIPPING_INFO = {
+    'country': 'United Kingdom',
+    'email': 'buyer@example.com',
+    'first_name': 'Test',
+    'last_name': 'Buyer',
+    'address1': '1 Example Street',
+    'address2': '',
+    'city': 'London',
+    'postal_code': 'SW1A 1AA',
+    'phone': '07700900000'
+}
+
+PAYMENT_INFO = {
+    'number': '4242 4242 4242 4242',
+    'expiry_month': '12',
+    'expiry_year': '30',
+    'cvv': '123'
+}
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def summarise(name, seconds):
+    if not seconds:
+        print(f"{name:<24} no samples")
+        return
+    print(f"{name:<24} median {statistics.median(seconds) * 1000:>8.1f} ms  "
+          f"p95 {percentile(seconds, 0.95) * 1000:>8.1f} ms  max {max(seconds) * 1000:>8.1f} ms  ({len(seconds)} samples)")
+
+
+def histogram_total(histogram):
+    """Return (count, sum) of a metrics histogram's unlabelled series."""
+    series = histogram.snapshot().get("total", {'count': 0, 'sum': 0.0})
+    return series['count'], series['sum']
+
+
+def measure_restocks(monitor, store, args):
+    """Restock products one at a time while the poll loop runs, timing each through to the cart (and Pay Now)."""
+    urls = []
+    for i in range(args.restocks):
+        handle = f"restock-{i}"
+        store.add_product(handle)
+        urls.append(f"{os.environ['STORE_URL']}/products/{handle}")
+    scheduler = PollScheduler(urls, interval=args.interval, requests_per_second=args.rps)
+    detection = []
+    to_cart = []
+    to_pay_click = []
+    detected = set()
+    done = threading.Event()
+    if args.checkout:
+        from productChecker import browserCheckout
+
+    def handle_batch(snapshots):
+        checkout_url, _ = monitor.add_items_to_cart(snapshots)
+        if checkout_url:
+            to_cart.append(time.monotonic() - snapshots[0].checked_at)
+        if checkout_url and args.checkout:
+            count, total = histogram_total(monitor.DETECTION_TO_PAY_CLICK)
+            browserCheckout.checkout(checkout_url, SHIPPING_INFO, PAYMENT_INFO, snapshots[0].checked_at)
+            new_count, new_total = histogram_total(monitor.DETECTION_TO_PAY_CLICK)
+            if new_count > count:
+                to_pay_click.append(new_total - total)
+        if len(to_cart) >= args.restocks:
+            done.set()
+
+    queue = CheckoutQueue(handle_batch, batch_window=0)
+    queue.start()
+    executor = ThreadPoolExecutor(max_workers=args.concurrency)
+    for i, url in enumerate(urls):
+        store.schedule(args.interval + i * args.spacing, monitor.product_handle(url))
+
+    deadline = time.monotonic() + args.interval * 2 + args.restocks * args.spacing + 60
+    try:
+        while not done.is_set() and time.monotonic() < deadline:
+            due = scheduler.due()
+            if not due:
+                time.sleep(max(0.01, min(scheduler.seconds_until_next() or args.interval, args.interval)))
+                continue
+            results, _ = monitor.check_products_concurrently(executor, due)
+            for url in due:
+                snapshot = results[url]
+                scheduler.record(url, snapshot.status, snapshot.retry_after)
+                handle = monitor.product_handle(url)
+                if snapshot.in_stock and handle not in detected:
+                    detected.add(handle)
+                    detection.append(snapshot.checked_at - store.restocked_at[handle])
+                    queue.submit(url, snapshot)
+        done.wait(max(0.0, deadline - time.monotonic()))
+    finally:
+        queue.stop()
+        executor.shutdown()
+        if args.checkout:
+            browserCheckout.driver_pool.shutdown()
+    return detection, to_cart, to_pay_click
+
+
+def measure_sweeps(monitor, store, sizes, sweeps, mode, concurrency):
+    """Time full sweeps over growing watchlists; the first sweep is cold, later ones revalidate."""
+    monitor.USE_PRODUCT_JSON = mode == "json"
+    executor = ThreadPoolExecutor(max_workers=concurrency)
+    try:
+        for size in sizes:
+            for i in range(size):
+                if f"sweep-{i}" not in store.products:
+                    store.add_product(f"sweep-{i}", available=i % 4 == 0)
+            urls = [f"{os.environ['STORE_URL']}/products/sweep-{i}" for i in range(size)]
+            monitor.response_cache.clear()
+            times = [monitor.check_products_concurrently(executor, urls)[1] for _ in range(sweeps)]
+            warm = statistics.median(times[1:]) if len(times) > 1 else times[0]
+            print(f"{mode:<5} {size:>5} products  cold {times[0] * 1000:>8.1f} ms  warm {warm * 1000:>8.1f} ms  "
+                  f"{size / warm:>8.0f} products/s")
+    finally:
+        executor.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--restocks", type=int, default=5)
+    parser.add_argument("--interval", type=float, default=1.0, help="poll interval in seconds")
+    parser.add_argument("--spacing", type=float, default=1.5, help="seconds between restocks")
+    parser.add_argument("--rps", type=float, default=20.0, help="request budget for the stand-in host")
+    parser.add_argument("--sizes", default="10,50,200")
+    parser.add_argument("--sweeps", type=int, default=3)
+    parser.add_argument("--concurrency", type=int, default=8, help="products checked in parallel")
+    parser.add_argument("--response-delay", type=float, default=0.02, help="server delay per request, to mimic network latency")
+    parser.add_argument("--checkout", action="store_true", help="also drive Chrome through checkout (needs Chrome)")
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    store = StandInStore()
+    server = start_stand_in(store, response_delay=args.response_delay)
+    # The checker reads STORE_URL at import, so it has to be set before importing it
+    os.environ["STORE_URL"] = f"http://127.0.0.1:{server.server_port}"
+    from productChecker import monitor
+    logging.basicConfig(format='%(asctime)s - %(levelname)s - %(message)s')
+    logging.getLogger().setLevel(logging.INFO if args.verbose else logging.WARNING)
+
+    try:
+        print(f"Restocking {args.restocks} products, polling every {args.interval:.2f}s")
+        detection, to_cart, to_pay_click = measure_restocks(monitor, store, args)
+        summarise("restock to detection", detection)
+        summarise("detection to cart", to_cart)
+        if args.checkout:
+            summarise("detection to pay click", to_pay_click)
+
+        sizes = [int(size) for size in args.sizes.split(",")]
+        for mode in ("json", "html"):
+            measure_sweeps(monitor, store, sizes, args.sweeps, mode, args.concurrency)
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
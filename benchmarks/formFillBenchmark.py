@@ -0,0 +1,83 @@
+"""Compare WebDriver round trips and time for batched and typed shipping form filling.
+
+Runs fill_shipping_info against the local checkout fixture in both modes.
+
+Usage: python benchmarks/formFillBenchmark.py [--runs N]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from selenium import webdriver
+from pageLoadBenchmark import start_server
+from productChecker.browserCheckout import configure_chrome_options, fill_shipping_info
+
+SHIPPING_INFO = {
+    'country': 'United Kingdom',
+    'email': 'buyer@example.com',
+    'first_name': 'Test',
+    'last_name': 'Buyer',
+    'address1': '1 Example Street',
+    'address2': '',
+    'city': 'London',
+    'postal_code': 'SW1A 1AA',
+    'phone': '07700900000'
+}
+
+
+class RoundTripCounter:
+    """Counts WebDriver commands by wrapping the driver's command dispatcher."""
+
+    def __init__(self, driver):
+        self.count = 0
+        execute = driver.execute
+
+        def counted(*args, **kwargs):
+            self.count += 1
+            return execute(*args, **kwargs)
+
+        driver.execute = counted
+
+
+def run_mode(driver, counter, url, mode, runs):
+    round_trips = []
+    times = []
+    for _ in range(runs):
+        driver.get(url)
+        counter.count = 0
+        start = time.perf_counter()
+        fill_shipping_info(driver, SHIPPING_INFO, mode=mode)
+        times.append(time.perf_counter() - start)
+        round_trips.append(counter.count)
+    return statistics.median(round_trips), statistics.median(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    server = start_server(0)
+    url = f"http://127.0.0.1:{server.server_port}/checkout"
+    driver = webdriver.Chrome(options=configure_chrome_options())
+    counter = RoundTripCounter(driver)
+    try:
+        results = {}
+        for mode in ("typed", "batch"):
+            results[mode] = run_mode(driver, counter, url, mode, args.runs)
+            round_trips, seconds = results[mode]
+            print(f"{mode:<6} {round_trips:>5.0f} round trips  {seconds * 1000:>8.1f} ms")
+        saved_trips = results["typed"][0] - results["batch"][0]
+        saved_ms = (results["typed"][1] - results["batch"][1]) * 1000
+        print(f"batch saves {saved_trips:.0f} round trips and {saved_ms:.1f} ms per shipping form")
+    finally:
+        driver.quit()
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
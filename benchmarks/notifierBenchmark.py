@@ -0,0 +1,109 @@
+"""Measure restock email latency against a local SMTP stand-in.
+
+Compares the old connect-per-email send (on the caller's thread) with the
+background NotificationDispatcher, reporting caller blocking time, send
+latency and queue depth.
+
+Usage: python benchmarks/notifierBenchmark.py [--restocks N] [--server-delay SECONDS]
+"""
+import argparse
+import os
+import smtplib
+import socketserver
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from productChecker.notifier import NotificationDispatcher
+
+
+class SMTPStandInHandler(socketserver.StreamRequestHandler):
+    """Just enough SMTP to accept mail, with an optional delay per command to mimic a remote server."""
+    delay = 0.0
+    messages = []
+
+    def reply(self, line):
+        time.sleep(self.delay)
+        self.wfile.write(line.encode() + b"\r\n")
+
+    def handle(self):
+        self.reply("220 localhost SMTP stand-in")
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode(errors="replace").strip().upper()
+            if command.startswith("EHLO"):
+                self.reply("250-localhost")
+                self.reply("250 8BITMIME")
+            elif command.startswith("DATA"):
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+                data = []
+                while True:
+                    line = self.rfile.readline()
+                    if line in (b".\r\n", b".\n", b""):
+                        break
+                    data.append(line)
+                SMTPStandInHandler.messages.append(b"".join(data))
+                self.reply("250 OK")
+            elif command.startswith("QUIT"):
+                self.reply("221 Bye")
+                return
+            else:
+                self.reply("250 OK")
+
+
+def start_smtp_stand_in(delay):
+    SMTPStandInHandler.delay = delay
+    server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), SMTPStandInHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def send_connect_per_email(port, restocks):
+    """The previous send_notification: a new connection for every email, on the caller's thread."""
+    for url, product_name in restocks:
+        with smtplib.SMTP("127.0.0.1", port) as server:
+            server.sendmail("bot@example.com", ["me@example.com"], f"Subject: {product_name} is now in stock!\n\n{url}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--restocks", type=int, default=10)
+    parser.add_argument("--server-delay", type=float, default=0.02)
+    args = parser.parse_args()
+
+    server = start_smtp_stand_in(args.server_delay)
+    port = server.server_address[1]
+    restocks = [(f"https://store.example/products/item-{i}", f"Item {i}") for i in range(args.restocks)]
+    try:
+        start = time.perf_counter()
+        send_connect_per_email(port, restocks)
+        blocking = time.perf_counter() - start
+        print(f"connect per email: caller blocked {blocking * 1000:.1f} ms for {len(restocks)} emails")
+
+        for digest_window in (0.0, 0.5):
+            dispatcher = NotificationDispatcher(
+                "127.0.0.1", port, from_addr="bot@example.com", to_addrs=["me@example.com"],
+                use_tls=False, digest_window=digest_window
+            )
+            dispatcher.start()
+            start = time.perf_counter()
+            for url, product_name in restocks:
+                dispatcher.notify(url, product_name)
+            blocking = time.perf_counter() - start
+            peak_depth = dispatcher.stats()['queue_depth']
+            dispatcher.stop()
+            stats = dispatcher.stats()
+            print(f"dispatcher (digest window {digest_window}s): caller blocked {blocking * 1000:.3f} ms, "
+                  f"{stats['sent']} emails sent, avg send {stats['avg_send_latency'] * 1000:.1f} ms, "
+                  f"queue depth after burst {peak_depth}")
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
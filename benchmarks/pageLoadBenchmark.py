@@ -0,0 +1,116 @@
+"""Measure checkout page-ready time with and without the fast checkout browser profile.
+
+Serves benchmarks/fixtures/checkout.html locally, with slow images, fonts and
+analytics scripts, and times how long Chrome takes until the form is usable.
+
+Usage: python benchmarks/pageLoadBenchmark.py [--runs N] [--asset-delay SECONDS]
+"""
+import argparse
+import os
+import statistics
+import sys
+import threading
+import time
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from selenium import webdriver
+from selenium.webdriver.common.by import By
+from productChecker.browserProfiles import BLOCKED_RESOURCE_PATTERNS, block_resources, measure_page_ready
+from productChecker.browserCheckout import configure_chrome_options
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+# The fixture serves third-party analytics from /analytics/ on the local host
+FIXTURE_BLOCKED_PATTERNS = BLOCKED_RESOURCE_PATTERNS + ["*/analytics/*"]
+
+SLOW_PREFIXES = ("/assets/", "/fonts/", "/analytics/")
+
+
+class FixtureHandler(SimpleHTTPRequestHandler):
+    """Serves fixture files, generating slow placeholder images, fonts and scripts."""
+    asset_delay = 0.3
+
+    def do_GET(self):
+        path = self.path.split('?')[0]
+        if path == "/checkout":
+            self.path = "/checkout.html"
+        if path.startswith(SLOW_PREFIXES):
+            time.sleep(self.asset_delay)
+            body = b"/* analytics */" if path.endswith(".js") else b"\0" * 64 * 1024
+            self.send_response(200)
+            self.send_header("Content-Type", "application/javascript" if path.endswith(".js") else "application/octet-stream")
+            self.send_header("Content-Length", str(len(body)))
+            self.send_header("Cache-Control", "no-store")
+            self.end_headers()
+            self.wfile.write(body)
+            return
+        super().do_GET()
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_server(asset_delay):
+    FixtureHandler.asset_delay = asset_delay
+    server = ThreadingHTTPServer(("127.0.0.1", 0), partial(FixtureHandler, directory=FIXTURES_DIR))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def card_iframes_work(driver):
+    """Check every card iframe loaded and its input can be typed into."""
+    try:
+        for field_id in ("number", "expiry", "verification_value"):
+            driver.switch_to.default_content()
+            driver.switch_to.frame(driver.find_element(By.CSS_SELECTOR, f"iframe[id^='card-fields-{field_id}-']"))
+            driver.find_element(By.ID, field_id).send_keys("1")
+        return True
+    except Exception as e:
+        print(f"Card iframe check failed: {e}")
+        return False
+    finally:
+        driver.switch_to.default_content()
+
+
+def run_profile(url, fast, runs):
+    driver = webdriver.Chrome(options=configure_chrome_options(fast_checkout=fast))
+    try:
+        if fast:
+            block_resources(driver, FIXTURE_BLOCKED_PATTERNS)
+        else:
+            driver.execute_cdp_cmd("Network.enable", {})
+        times = []
+        for _ in range(runs):
+            driver.execute_cdp_cmd("Network.clearBrowserCache", {})
+            times.append(measure_page_ready(driver, url, "#email"))
+        return times, card_iframes_work(driver)
+    finally:
+        driver.quit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--asset-delay", type=float, default=0.3)
+    args = parser.parse_args()
+
+    server = start_server(args.asset_delay)
+    url = f"http://127.0.0.1:{server.server_port}/checkout"
+    try:
+        results = {}
+        for name, fast in (("default", False), ("fast checkout", True)):
+            times, iframes_ok = run_profile(url, fast, args.runs)
+            results[name] = statistics.median(times)
+            print(f"{name:<14} median {results[name] * 1000:>8.1f} ms  "
+                  f"min {min(times) * 1000:>8.1f} ms  card iframes {'ok' if iframes_ok else 'BROKEN'}")
+        saved = results["default"] - results["fast checkout"]
+        print(f"fast checkout saves {saved * 1000:.1f} ms per page load")
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""Compare the streaming product page extractor with full-tree BeautifulSoup parsing.
+
+Usage: python benchmarks/parserBenchmark.py [--iterations N]
+"""
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bs4 import BeautifulSoup, SoupStrainer
+from productChecker.productExtractor import extract_product_page
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+BUTTON_CLASS = "product-form__submit button button--primary"
+
+
+def read_with_soup(soup):
+    """The stock check and variant lookup done in productChecker, read from a BeautifulSoup tree."""
+    product_name = soup.find("h1", class_="product__title").get_text(strip=True)
+    add_to_cart_button = soup.find("button", class_=BUTTON_CLASS)
+    in_stock = bool(add_to_cart_button) and "add to cart" in add_to_cart_button.get_text(strip=True).lower()
+    variant_id = None
+    for script in soup.find_all('script', type='application/json'):
+        try:
+            data = json.loads(script.string)
+        except json.JSONDecodeError:
+            continue
+        if isinstance(data, dict) and 'variants' in data:
+            # The first variant that can actually be bought, as the checker now adds to the cart
+            variant_id = next((str(variant['id']) for variant in data['variants'] if variant.get('available')), None)
+            break
+    return in_stock, product_name, variant_id
+
+
+def parse_beautifulsoup(content):
+    return read_with_soup(BeautifulSoup(content, 'html.parser'))
+
+
+def parse_beautifulsoup_strainer(content):
+    strainer = SoupStrainer(["h1", "button", "script"])
+    return read_with_soup(BeautifulSoup(content, 'html.parser', parse_only=strainer))
+
+
+def parse_streaming(content):
+    page = extract_product_page(content)
+    return page.in_stock, page.title, page.variant_id
+
+
+PARSERS = {
+    "beautifulsoup": parse_beautifulsoup,
+    "soup-strainer": parse_beautifulsoup_strainer,
+    "streaming": parse_streaming,
+}
+
+
+def measure(parse, content, iterations):
+    """Return (pages per second, peak traced bytes) for one parser over one page."""
+    start = time.perf_counter()
+    for _ in range(iterations):
+        parse(content)
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    parse(content)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return iterations / elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=50)
+    args = parser.parse_args()
+
+    print(f"{'fixture':<28} {'parser':<14} {'pages/s':>10} {'peak KiB':>10} {'speedup':>8}")
+    for path in sorted(glob.glob(os.path.join(FIXTURES_DIR, "product_*.html"))):
+        with open(path, "rb") as f:
+            content = f.read()
+        fixture = os.path.basename(path)
+        expected = parse_beautifulsoup(content)
+        baseline = None
+        for name, parse in PARSERS.items():
+            result = parse(content)
+            if result != expected:
+                print(f"{fixture}: {name} returned {result}, expected {expected}")
+            rate, peak = measure(parse, content, args.iterations)
+            baseline = baseline or rate
+            print(f"{fixture:<28} {name:<14} {rate:>10.1f} {peak / 1024:>10.1f} {rate / baseline:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,256 @@
+"""Local stand-in for the Shopify storefront, so the checker can run end to end without the live store.
+
+Serves product pages rendered from the recorded fixtures, /products/<handle>.js,
+/collections/<name>/products.json, cart/add.js with a cart cookie and the
+checkout fixture with its card iframes. Stock can be flipped directly or on a
+schedule, and the time of every restock is kept for measuring detection latency.
+
+Usage: python benchmarks/shopifyStandIn.py [--port PORT] [--restock-after SECONDS]
+Then point the checker at it: STORE_URL=http://127.0.0.1:PORT python -m productChecker
+"""
+import argparse
+import hashlib
+import html
+import json
+import os
+import re
+import secrets
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+SLOW_PREFIXES = ("/assets/", "/fonts/", "/analytics/")
+
+TITLE_PATTERN = re.compile(r'(<h1 class="product__title">).*?(</h1>)', re.S)
+PRODUCT_JSON_PATTERN = re.compile(r'<script type="application/json">\{"id": \d+, "title".*?</script>')
+VARIANT_INPUT_PATTERN = re.compile(r'(<input type="hidden" name="id" value=")\d+(")')
+BUTTON_PATTERN = re.compile(r'(class="product-form__submit button button--primary">\s*<span>).*?(</span>)', re.S)
+
+
+def read_fixture(name):
+    with open(os.path.join(FIXTURES_DIR, name), encoding="utf-8") as f:
+        return f.read()
+
+
+class StandInStore:
+    """Product catalogue, carts and restock times behind the stand-in server."""
+
+    def __init__(self):
+        self.products = {}
+        self.restocked_at = {}
+        self.carts = {}
+        self.orders = []
+        self._next_id = 45012345678901
+        self._lock = threading.Lock()
+        self._page_template = read_fixture("product_in_stock.html")
+
+    def add_product(self, handle, title=None, variants=1, available=False, price=2000):
+        with self._lock:
+            product = {
+                'id': self._next_id,
+                'title': title or handle.replace("-", " ").title(),
+                'handle': handle,
+                'available': available,
+                'price': price,
+                'variants': []
+            }
+            self._next_id += 1
+            sizes = ["Default Title"] if variants == 1 else [f"Size {i + 1}" for i in range(variants)]
+            for size in sizes:
+                product['variants'].append({
+                    'id': self._next_id,
+                    'title': size,
+                    'option1': size,
+                    'available': available,
+                    'price': price
+                })
+                self._next_id += 1
+            self.products[handle] = product
+            return product
+
+    def set_available(self, handle, available, variant_index=None):
+        """Change stock for one variant, or all of them, recording when the product came back."""
+        with self._lock:
+            product = self.products[handle]
+            was_available = product['available']
+            for i, variant in enumerate(product['variants']):
+                if variant_index is None or i == variant_index:
+                    variant['available'] = available
+            product['available'] = any(variant['available'] for variant in product['variants'])
+            if product['available'] and not was_available:
+                self.restocked_at[handle] = time.monotonic()
+
+    def schedule(self, delay, handle, available=True, variant_index=None):
+        """Flip stock after delay seconds on a timer thread."""
+        timer = threading.Timer(delay, self.set_available, (handle, available, variant_index))
+        timer.daemon = True
+        timer.start()
+        return timer
+
+    def product_json(self, handle):
+        with self._lock:
+            product = self.products.get(handle)
+            return json.dumps(product) if product else None
+
+    def product_page(self, handle):
+        with self._lock:
+            product = self.products.get(handle)
+            if not product:
+                return None
+            page = TITLE_PATTERN.sub(lambda m: f"{m.group(1)}\n  {html.escape(product['title'])}\n{m.group(2)}", self._page_template, count=1)
+            page = PRODUCT_JSON_PATTERN.sub(lambda m: f'<script type="application/json">{json.dumps(product)}</script>', page, count=1)
+            page = VARIANT_INPUT_PATTERN.sub(lambda m: f"{m.group(1)}{product['variants'][0]['id']}{m.group(2)}", page, count=1)
+            button_text = "Add to cart" if product['available'] else "Sold out"
+            return BUTTON_PATTERN.sub(lambda m: f"{m.group(1)}{button_text}{m.group(2)}", page, count=1)
+
+    def collection_page(self, limit, page):
+        with self._lock:
+            products = list(self.products.values())[(page - 1) * limit:page * limit]
+            return json.dumps({'products': products})
+
+    def add_to_cart(self, items):
+        """Return (status, body, cart token) for a cart/add.js request."""
+        with self._lock:
+            variants = {variant['id']: variant for product in self.products.values() for variant in product['variants']}
+            for item in items:
+                variant = variants.get(int(item['id']))
+                if variant is None:
+                    return 404, {'status': 404, 'message': 'Cart Error', 'description': 'Cannot find variant'}, None
+                if not variant['available']:
+                    return 422, {'status': 422, 'message': 'Cart Error', 'description': 'The product is already sold out.'}, None
+            token = secrets.token_hex(16)
+            self.carts[token] = items
+            return 200, {'items': items}, token
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_HEAD(self):
+        self.respond(200, b"", "text/html", head=True)
+
+    def do_GET(self):
+        store = self.server.store
+        if self.server.response_delay:
+            time.sleep(self.server.response_delay)
+        parts = urlsplit(self.path)
+        path = parts.path
+        if path.startswith("/products/") and path.endswith(".js"):
+            body = store.product_json(path[len("/products/"):-len(".js")])
+            self.respond_cacheable(body, "application/json")
+        elif path.startswith("/products/"):
+            self.respond_cacheable(store.product_page(path[len("/products/"):].rstrip("/")), "text/html; charset=utf-8", etag=False)
+        elif path.startswith("/collections/") and path.endswith("/products.json"):
+            query = parse_qs(parts.query)
+            limit = int(query.get('limit', ['30'])[0])
+            page = int(query.get('page', ['1'])[0])
+            self.respond_cacheable(store.collection_page(limit, page), "application/json")
+        elif path.startswith("/checkouts/cn/"):
+            if path[len("/checkouts/cn/"):] in store.carts:
+                self.respond(200, read_fixture("checkout.html").encode(), "text/html; charset=utf-8")
+            else:
+                self.respond(404, b"Checkout not found", "text/plain")
+        elif path.startswith("/card-fields/") and path.endswith(".html"):
+            self.respond(200, read_fixture(path.lstrip("/")).encode(), "text/html; charset=utf-8")
+        elif path == "/thank-you":
+            store.orders.append(time.monotonic())
+            self.respond(200, b"<!doctype html><h1>Thank you for your order</h1>", "text/html")
+        elif path.startswith(SLOW_PREFIXES):
+            time.sleep(self.server.asset_delay)
+            self.respond(200, b"/* asset */", "application/octet-stream")
+        elif path == "/":
+            self.respond(200, b"<!doctype html><h1>Stand-in store</h1>", "text/html")
+        else:
+            self.respond(404, b"Not found", "text/plain")
+
+    def do_POST(self):
+        if self.server.response_delay:
+            time.sleep(self.server.response_delay)
+        length = int(self.headers.get('Content-Length', 0))
+        if urlsplit(self.path).path != "/cart/add.js":
+            self.rfile.read(length)
+            self.respond(404, b"Not found", "text/plain")
+            return
+        try:
+            payload = json.loads(self.rfile.read(length) or b"{}")
+            items = payload.get('items') or [{'id': payload['id'], 'quantity': payload.get('quantity', 1)}]
+        except (ValueError, KeyError):
+            self.respond(400, b'{"status": 400, "description": "Bad request"}', "application/json")
+            return
+        status, body, token = self.server.store.add_to_cart(items)
+        headers = {}
+        if token:
+            headers['Set-Cookie'] = f"cart={token}%3Fkey%3D{secrets.token_hex(8)}; path=/; SameSite=Lax"
+        self.respond(status, json.dumps(body).encode(), "application/json", headers=headers)
+
+    def respond_cacheable(self, body, content_type, etag=True):
+        """Send a body with an ETag, answering 304 when the client already has it."""
+        if body is None:
+            self.respond(404, b"Not found", "text/plain")
+            return
+        body = body.encode()
+        if not etag:
+            self.respond(200, body, content_type)
+            return
+        tag = f'"{hashlib.md5(body).hexdigest()}"'
+        if self.headers.get('If-None-Match') == tag:
+            self.respond(304, b"", content_type, headers={'ETag': tag})
+        else:
+            self.respond(200, body, content_type, headers={'ETag': tag})
+
+    def respond(self, status, body, content_type, headers=None, head=False):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        if status != 304:
+            self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if not head and status != 304:
+            self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_stand_in(store, port=0, response_delay=0.0, asset_delay=0.0):
+    """Serve the store on a background thread; the chosen port is server.server_port."""
+    server = ThreadingHTTPServer(("127.0.0.1", port), StandInHandler)
+    server.daemon_threads = True
+    server.store = store
+    server.response_delay = response_delay
+    server.asset_delay = asset_delay
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=8800)
+    parser.add_argument("--restock-after", type=float, default=30.0, help="seconds until every product comes into stock")
+    parser.add_argument("--response-delay", type=float, default=0.0)
+    args = parser.parse_args()
+    # Imported here so scripts that import this module can still set STORE_URL before the config is read
+    from productChecker.config import PRODUCT_HANDLES
+
+    store = StandInStore()
+    for handle in PRODUCT_HANDLES:
+        store.add_product(handle, variants=3 if handle.endswith("socks") else 1)
+        store.schedule(args.restock_after, handle)
+    server = start_stand_in(store, args.port, args.response_delay)
+    print(f"Stand-in store on http://127.0.0.1:{server.server_port}, restocking in {args.restock_after:.0f}s")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""Measure startup time and resident memory of monitor-only and full (checkout) mode.
+
+Each mode starts in a fresh interpreter and gets as far as being ready to poll:
+monitor-only imports just the polling code, full mode also loads the Selenium
+checkout code and, with --with-browser, starts Chrome the way WARM_DRIVERS would.
+Memory is read from /proc, so this needs Linux.
+
+Usage: python benchmarks/startupBenchmark.py [--runs N] [--with-browser]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+STARTUP_SCRIPT = """
+import json, os, sys, time
+start = time.perf_counter()
+import productChecker.bot
+if sys.argv[1] != "monitor-only":
+    from productChecker import browserCheckout
+ready = time.perf_counter() - start
+browser_mb = 0
+if sys.argv[1] == "full+browser":
+    from productChecker.driverPool import tree_rss_mb
+    driver = browserCheckout.create_driver()
+    ready = time.perf_counter() - start
+    browser_mb = tree_rss_mb(driver.service.process.pid) or 0
+    driver.quit()
+print(json.dumps({
+    'ready': ready,
+    'rss_kb': int(open("/proc/self/status").read().split("VmRSS:")[1].split()[0]),
+    'browser_mb': browser_mb,
+    'selenium_loaded': 'selenium' in sys.modules
+}))
+"""
+
+
+def run_mode(mode):
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE="1")
+    start = time.perf_counter()
+    output = subprocess.run(
+        [sys.executable, "-c", STARTUP_SCRIPT, mode], cwd=ROOT, env=env, capture_output=True, text=True, check=True
+    ).stdout
+    total = time.perf_counter() - start
+    result = json.loads(output.strip().splitlines()[-1])
+    result['total'] = total
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--with-browser", action="store_true", help="also start Chrome in full mode (needs Chrome)")
+    args = parser.parse_args()
+
+    modes = ["monitor-only", "full"] + (["full+browser"] if args.with_browser else [])
+    for mode in modes:
+        runs = [run_mode(mode) for _ in range(args.runs)]
+        ready = statistics.median(run['ready'] for run in runs)
+        total = statistics.median(run['total'] for run in runs)
+        rss = statistics.median(run['rss_kb'] for run in runs) / 1024
+        browser = statistics.median(run['browser_mb'] for run in runs)
+        line = (f"{mode:<13} ready {ready * 1000:>8.1f} ms  process start to ready {total * 1000:>8.1f} ms  "
+                f"python RSS {rss:>6.1f} MB  selenium {'loaded' if runs[0]['selenium_loaded'] else 'not loaded'}")
+        if browser:
+            line += f"  browser RSS {browser:>7.1f} MB"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""Measure stock index update cost and events per sweep as the watchlist grows.
+
+Each sweep re-polls every product in a synthetic watchlist (a third of them with
+several sizes) and flips stock on a fixed number of variants, so the events the
+monitor acts on should follow the number of changes, not the watchlist size.
+
+Usage: python benchmarks/stockIndexBenchmark.py [--sizes 100,1000,10000] [--changes 5] [--sweeps 20]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from productChecker.monitor import ProductSnapshot
+from productChecker.stockIndex import StockIndex
+
+
+def build_watchlist(size):
+    """Return url -> list of [variant_id, available] for a synthetic watchlist."""
+    watchlist = {}
+    next_id = 1
+    for i in range(size):
+        variants = []
+        for _ in range(4 if i % 3 == 0 else 1):
+            variants.append([str(next_id), False])
+            next_id += 1
+        watchlist[f"https://store.example/products/product-{i}"] = variants
+    return watchlist
+
+
+def snapshot(url, variants):
+    return ProductSnapshot(
+        url, url.rsplit("/", 1)[-1], any(available for _, available in variants),
+        [tuple(variant) for variant in variants], {variant_id: 2000 for variant_id, _ in variants}
+    )
+
+
+def measure(size, changes, sweeps):
+    rng = random.Random(size)
+    watchlist = build_watchlist(size)
+    index = StockIndex()
+    for url, variants in watchlist.items():
+        index.update(snapshot(url, variants))
+    urls = list(watchlist)
+    timings = []
+    events = []
+    for _ in range(sweeps):
+        for url in rng.sample(urls, changes):
+            variant = rng.choice(watchlist[url])
+            variant[1] = not variant[1]
+        snapshots = [snapshot(url, variants) for url, variants in watchlist.items()]
+        start = time.perf_counter()
+        sweep_events = [event for item in snapshots for event in index.update(item)]
+        timings.append(time.perf_counter() - start)
+        events.append(len(sweep_events))
+    return statistics.median(timings), statistics.mean(events)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="100,1000,10000")
+    parser.add_argument("--changes", type=int, default=5, help="variants flipped per sweep")
+    parser.add_argument("--sweeps", type=int, default=20)
+    args = parser.parse_args()
+
+    for size in (int(value) for value in args.sizes.split(",")):
+        seconds, events = measure(size, args.changes, args.sweeps)
+        print(f"{size:>6} products  index update {seconds * 1000:>8.2f} ms/sweep "
+              f"({seconds / size * 1e6:.2f} us/product)  events {events:>5.1f}/sweep")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,2 @@
+# Submodules are imported on demand so that importing the package stays cheap:
+# monitor for polling, browserCheckout (Selenium) only when a checkout happens.
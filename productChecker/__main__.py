@@ -0,0 +1,5 @@
+from .cli import main
+
+# Guarded so checkout worker processes, which re-import the main module, do not start another bot
+if __name__ == "__main__":
+    main()
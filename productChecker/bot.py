@@ -0,0 +1,229 @@
+import sys
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from .config import (
+    STOREFRONTS, PRODUCT_URLS, POLL_INTERVAL, POLL_CONCURRENCY, PRODUCT_INTERVALS, POLL_JITTER,
+    MAX_POLL_INTERVAL, HOST_REQUESTS_PER_SECOND, PREWARM_CONNECTIONS, WARM_DRIVERS, MONITOR_ONLY,
+    CHECKOUT_BATCH_WINDOW, CHECKOUT_WORKERS, CHECKOUT_WORKER_TIMEOUT, PARSE_PROCESSES, METRICS_PORT,
+    METRICS_SNAPSHOT_INTERVAL, METRICS_SNAPSHOT_FILE, STATE_FILE, SMTP_SERVER
+)
+from .httpClient import prewarm
+from .checkoutQueue import CheckoutQueue
+from .checkoutSteps import CHECKOUT_CONFIRMED, CHECKOUT_UNCONFIRMED
+from .checkoutWorkers import CheckoutWorkerPool
+from .pollScheduler import PollScheduler
+from .metrics import MetricsServer, registry
+from .monitor import (
+    CHECKOUTS, STOCK_TRANSITIONS, VARIANT_EVENTS, notified_products, parse_stats, profiler, state_store, stock_index,
+    notification_dispatcher, add_items_to_cart, check_products_bulk, check_products_concurrently, load_state,
+    product_handle, send_notification, start_parse_pool, stop_parse_pool
+)
+from .storefront import group_by_storefront
+
+
+def browser_checkout():
+    """Import the Selenium checkout code on first use, so monitoring alone never loads it."""
+    from . import browserCheckout
+    return browserCheckout
+
+
+def checkout_storefront(storefront, snapshots, on_pay=None):
+    """Add a store's detected products to one cart and check it out with its profile.
+
+    Returns (snapshots in the cart, checkout URL) once the order is confirmed, or once Pay Now
+    was clicked even if it was not; None otherwise. Products left out of the cart are not included.
+    on_pay(snapshots in the cart, checkout URL, paying) is called as Pay Now is clicked or turns out not to be.
+    """
+    checkout_url, added = add_items_to_cart(snapshots)
+    if checkout_url and checkout_url.startswith(storefront.checkout_base_url):
+        detected_at = [snapshot.checked_at for snapshot in added if snapshot.checked_at is not None]
+        outcome = browser_checkout().checkout(
+            checkout_url, storefront.shipping_info, storefront.payment_info, min(detected_at) if detected_at else None,
+            on_pay=(lambda paying: on_pay(added, checkout_url, paying)) if on_pay else None
+        )
+        CHECKOUTS.inc(result={CHECKOUT_CONFIRMED: "success", CHECKOUT_UNCONFIRMED: "unconfirmed"}.get(outcome, "failure"))
+        if outcome == CHECKOUT_CONFIRMED:
+            logging.info(f"Checkout successful on {storefront.name}")
+            return added, checkout_url
+        if outcome == CHECKOUT_UNCONFIRMED:
+            # Count it as bought: retrying would open a new cart and could pay twice
+            logging.warning(f"Order on {storefront.name} was submitted but not confirmed, check {checkout_url} before buying again")
+            return added, checkout_url
+    return None
+
+
+def checkout_snapshots(snapshots, on_pay=None, on_purchase=None):
+    """Check out detected products with one cart per storefront, returning (snapshots, checkout_url) for each that succeeded.
+
+    on_purchase(snapshots, checkout_url) is called as soon as each cart is bought.
+    """
+    purchases = []
+    for storefront, group in group_by_storefront(snapshots, STOREFRONTS, url=lambda snapshot: snapshot.url):
+        purchase = checkout_storefront(storefront, group, on_pay)
+        if purchase:
+            purchases.append(purchase)
+            if on_purchase:
+                on_purchase(*purchase)
+    return purchases
+
+
+def record_purchases(snapshots, checkout_url):
+    """Remember bought products so they are never checked out again, even after a restart."""
+    notified_products.update(snapshot.url for snapshot in snapshots)
+    for snapshot in snapshots:
+        state_store.record_purchase(snapshot.url, snapshot.name, snapshot.variant_id, checkout_url)
+
+
+def checkout_products(snapshots):
+    """Check out detected products, one cart per storefront."""
+    for group, checkout_url in checkout_snapshots(snapshots):
+        record_purchases(group, checkout_url)
+
+
+checkout_queue = CheckoutQueue(checkout_products, batch_window=CHECKOUT_BATCH_WINDOW)
+
+
+def log_variant_event(event):
+    price = f" at {event.price}" if event.price is not None else ""
+    if event.kind == "new_variant":
+        logging.info(f"{event.name}: new variant {event.variant_id}{price} ({'in stock' if event.available else 'sold out'})")
+    else:
+        logging.info(f"{event.name}: variant {event.variant_id}{price} is {event.kind.replace('_', ' ')}")
+
+
+def handle_stock_event(event, monitor_only, checkouts, awaiting_checkout):
+    """React to one change reported by the stock index."""
+    if event.variant_id:
+        VARIANT_EVENTS.inc(kind=event.kind)
+        log_variant_event(event)
+        return
+    url, product_name = event.url, event.name
+    if event.previous != event.available:
+        if event.previous is not None:
+            STOCK_TRANSITIONS.inc(to=event.kind)
+        state_store.save_stock_state(url, event.available)
+    if not event.available:
+        awaiting_checkout.pop(url, None)
+        logging.info(f"{product_name} is out of stock")
+        return
+    if url in notified_products:
+        return
+    if monitor_only:
+        # Email once per restock, not again after a restart while it stays in stock
+        if event.previous is not True:
+            logging.info(f"{product_name} is in stock: {url}")
+            send_notification(url, product_name)
+    else:
+        awaiting_checkout[url] = event.snapshot
+        if checkouts.submit(url, event.snapshot):
+            send_notification(url, product_name)
+
+
+def retry_checkouts(checkouts, awaiting_checkout, results):
+    """Queue in-stock products polled this sweep again if their checkout failed, dropping bought ones."""
+    for url in list(awaiting_checkout):
+        snapshot = results.get(url)
+        if snapshot is None or not snapshot.in_stock:
+            continue
+        if url in notified_products:
+            del awaiting_checkout[url]
+        else:
+            awaiting_checkout[url] = snapshot
+            checkouts.submit(url, snapshot)
+
+
+def main(monitor_only=MONITOR_ONLY):
+    """Poll products concurrently and check out anything that comes into stock.
+
+    With monitor_only, restocks are only emailed and no browser is ever started.
+    """
+    executor = ThreadPoolExecutor(max_workers=POLL_CONCURRENCY, thread_name_prefix="poller")
+    scheduler = PollScheduler(
+        PRODUCT_URLS,
+        interval=POLL_INTERVAL,
+        intervals={url: PRODUCT_INTERVALS[product_handle(url)] for url in PRODUCT_URLS if product_handle(url) in PRODUCT_INTERVALS},
+        jitter=POLL_JITTER,
+        max_interval=MAX_POLL_INTERVAL,
+        requests_per_second=HOST_REQUESTS_PER_SECOND,
+        host_requests_per_second={storefront.host: storefront.requests_per_second for storefront in STOREFRONTS}
+    )
+    # Poll everything from collection listings each sweep when any storefront has them
+    bulk = any(storefront.collections for storefront in STOREFRONTS)
+    metrics_server = None
+    if METRICS_PORT:
+        metrics_server = MetricsServer(
+            registry, METRICS_PORT, snapshot_interval=METRICS_SNAPSHOT_INTERVAL, snapshot_file=METRICS_SNAPSHOT_FILE, profiler=profiler
+        )
+        metrics_server.start()
+    # kill -USR1 toggles profiling of the polling threads, kill -USR2 writes a memory snapshot
+    profiler.install_signals()
+    if STATE_FILE:
+        load_state()
+    # In-stock products not yet bought, kept for retrying checkout
+    awaiting_checkout = {}
+    if PREWARM_CONNECTIONS:
+        for storefront in STOREFRONTS:
+            prewarm(storefront.base_url, PREWARM_CONNECTIONS)
+    checkouts = checkout_queue
+    if not monitor_only:
+        if CHECKOUT_WORKERS:
+            checkouts = CheckoutWorkerPool(
+                CHECKOUT_WORKERS, record_purchases,
+                batch_window=CHECKOUT_BATCH_WINDOW, checkout_timeout=CHECKOUT_WORKER_TIMEOUT
+            )
+        elif WARM_DRIVERS:
+            browser_checkout().driver_pool.start()
+        checkouts.start()
+    if PARSE_PROCESSES:
+        start_parse_pool(PARSE_PROCESSES)
+    if SMTP_SERVER:
+        notification_dispatcher.start()
+    try:
+        while True:
+            if bulk:
+                urls = PRODUCT_URLS
+                results, _ = check_products_bulk(executor, urls)
+            else:
+                # Poll whichever products are due, as the host budgets allow
+                urls = scheduler.due()
+                if not urls:
+                    time.sleep(max(0.05, min(scheduler.seconds_until_next() or POLL_INTERVAL, POLL_INTERVAL)))
+                    continue
+                results, _ = check_products_concurrently(executor, urls)
+                for url in urls:
+                    scheduler.record(url, results[url].status, results[url].retry_after)
+                logging.debug(f"Poll queue: {scheduler.queue_state()}")
+            logging.info(f"Parse cache: {parse_stats['hits']} hits, {parse_stats['misses']} misses")
+            # Only changes are acted on; unchanged products cost one index comparison
+            events = [event for url in urls for event in stock_index.update(results[url])]
+            for event in events:
+                handle_stock_event(event, monitor_only, checkouts, awaiting_checkout)
+            if not monitor_only:
+                retry_checkouts(checkouts, awaiting_checkout, results)
+            if events:
+                logging.info(f"{len(events)} stock changes, index: {stock_index.counts()}")
+
+            if notified_products.issuperset(PRODUCT_URLS):
+                logging.info("All products checked")
+                break
+            if bulk:
+                logging.info("Checking again...")
+                logging.info("##############################################")
+                time.sleep(POLL_INTERVAL)
+    finally:
+        if SMTP_SERVER:
+            notification_dispatcher.stop()
+            logging.info(f"Email stats: {notification_dispatcher.stats()}")
+        if not monitor_only:
+            checkouts.stop()
+        executor.shutdown(wait=False)
+        stop_parse_pool()
+        browser = sys.modules.get(f"{__package__}.browserCheckout")
+        if browser:
+            browser.driver_pool.shutdown()
+            browser.diagnostics.stop()
+        if metrics_server:
+            metrics_server.stop()
+        profiler.stop()
+        state_store.close()
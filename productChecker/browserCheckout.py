@@ -0,0 +1,286 @@
+import time
+import logging
+import multiprocessing
+from selenium import webdriver
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.chrome.options import Options
+from selenium.common.exceptions import (
+    ElementClickInterceptedException, ElementNotInteractableException, NoSuchElementException
+)
+from .config import (
+    STOREFRONTS, WARM_DRIVERS, FAST_CHECKOUT, FORM_FILL_MODE, CHECKOUT_ATTEMPTS, PAY_CONFIRM_TIMEOUT,
+    DIAGNOSTICS_DIR, DIAGNOSTICS_MAX_MB, DIAGNOSTICS_MAX_AGE,
+    DRIVER_MAX_MEMORY_MB, DRIVER_MAX_AGE, DRIVER_CHECK_INTERVAL, DRIVER_PROBE_TIMEOUT
+)
+from .driverPool import DriverPool
+from .diagnostics import DiagnosticsRecorder
+from .checkoutSteps import CHECKOUT_CONFIRMED, CHECKOUT_FAILED, CHECKOUT_UNCONFIRMED, CheckoutFlow, CheckoutStep
+from .browserProfiles import apply_fast_checkout_options, block_resources
+from .formFill import fill_fields
+from .monitor import (
+    STAGE_SECONDS, DETECTION_TO_PAY_CLICK, DRIVER_RECYCLES, DRIVER_MEMORY, DRIVER_MEMORY_GROWTH, DRIVER_PROBE_SECONDS
+)
+
+# Errors raised before a click is dispatched to the page: Pay Now was certainly not pressed
+CLICK_NOT_SENT_ERRORS = (ElementClickInterceptedException, ElementNotInteractableException, NoSuchElementException)
+
+# Checkout step names as reported in the stage_seconds metric
+CHECKOUT_STAGES = {
+    'navigate': 'browser_navigation',
+    'shipping': 'fill_shipping_info',
+    'payment': 'fill_payment_info',
+    'pay': 'pay_click',
+    'confirm': 'confirm'
+}
+
+
+def configure_chrome_options(fast_checkout=FAST_CHECKOUT):
+    """Configure Chrome options for headless browsing."""
+    chrome_options = Options()
+    chrome_options.add_argument("--headless")
+    chrome_options.add_argument("--disable-gpu")
+    chrome_options.add_argument("--no-sandbox")
+    chrome_options.add_argument("--disable-dev-shm-usage")
+    chrome_options.add_argument("--window-size=1920x1080")
+    chrome_options.add_argument("user-agent=Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36")
+    chrome_options.add_argument("--disable-blink-features=AutomationControlled")
+    chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
+    chrome_options.add_experimental_option("useAutomationExtension", False)
+    if fast_checkout:
+        apply_fast_checkout_options(chrome_options)
+    logging.info("Chrome options configured")
+    return chrome_options
+
+def create_driver():
+    """Start a Chrome WebDriver."""
+    driver = webdriver.Chrome(options=configure_chrome_options())
+    if FAST_CHECKOUT:
+        block_resources(driver)
+    return driver
+
+def record_driver_health(health):
+    """Publish the driver pool's memory and probe readings after each supervision pass."""
+    process = multiprocessing.current_process().name
+    if health['memory_mb_total'] is not None:
+        DRIVER_MEMORY.set(health['memory_mb_total'], stat="total", process=process)
+        DRIVER_MEMORY.set(health['memory_mb_max'], stat="max", process=process)
+    if health['memory_growth_mb_per_hour'] is not None:
+        DRIVER_MEMORY_GROWTH.set(health['memory_growth_mb_per_hour'], process=process)
+    if health['probe_seconds_max'] is not None:
+        DRIVER_PROBE_SECONDS.observe(health['probe_seconds_max'])
+
+driver_pool = DriverPool(
+    create_driver, warm_size=WARM_DRIVERS, warm_urls=[storefront.base_url for storefront in STOREFRONTS], page_load_timeout=20,
+    max_memory_mb=DRIVER_MAX_MEMORY_MB, max_age=DRIVER_MAX_AGE, check_interval=DRIVER_CHECK_INTERVAL,
+    probe_timeout=DRIVER_PROBE_TIMEOUT, on_recycle=lambda reason: DRIVER_RECYCLES.inc(reason=reason),
+    on_sample=record_driver_health
+)
+diagnostics = DiagnosticsRecorder(DIAGNOSTICS_DIR, max_bytes=int(DIAGNOSTICS_MAX_MB * 1024 * 1024), max_age=DIAGNOSTICS_MAX_AGE)
+
+
+def capture_diagnostics(driver, label, details):
+    """Grab a screenshot and the DOM of the failed page; the recorder thread writes them to disk."""
+    if not DIAGNOSTICS_DIR:
+        return
+    start = time.perf_counter()
+    screenshot = page_source = None
+    try:
+        driver.switch_to.default_content()
+        screenshot = driver.get_screenshot_as_png()
+        page_source = driver.page_source
+        details = dict(details, url=driver.current_url)
+    except Exception as e:
+        logging.warning(f"Could not capture diagnostics: {e}")
+    STAGE_SECONDS.observe(time.perf_counter() - start, stage="diagnostics_capture")
+    diagnostics.record(label, screenshot, page_source, details)
+
+
+def fill_field(wait, locator, text):
+    """Wait for an input, clear it and type into it."""
+    element = wait.until(EC.presence_of_element_located(locator))
+    element.clear()
+    element.send_keys(text)
+    return element
+
+
+def fill_shipping_info(driver, shipping_info, timeout=10, mode=None):
+    """Fill in the shipping information."""
+    mode = mode or FORM_FILL_MODE
+    try:
+        logging.info(f"Filling shipping information ({mode})")
+        wait = WebDriverWait(driver, timeout)
+        if mode == "batch":
+            wait.until(EC.presence_of_element_located((By.ID, "email")))
+            fill_fields(driver, {
+                "email": shipping_info['email'],
+                "Select0": shipping_info['country'],
+                "TextField0": shipping_info['first_name'],
+                "TextField1": shipping_info['last_name'],
+                "TextField5": shipping_info['phone']
+            })
+        else:
+            fill_field(wait, (By.ID, "email"), shipping_info['email'])
+            wait.until(EC.presence_of_element_located((By.ID, "Select0"))).send_keys(shipping_info['country'])
+            fill_field(wait, (By.ID, "TextField0"), shipping_info['first_name'])
+            fill_field(wait, (By.ID, "TextField1"), shipping_info['last_name'])
+            fill_field(wait, (By.ID, "TextField5"), shipping_info['phone'])
+
+        # The address autocomplete only reacts to real key events, so it is always typed
+        fill_field(wait, (By.ID, "shipping-address1"), shipping_info['address1'])
+        wait.until(EC.element_to_be_clickable((By.ID, "shipping-address1-option-0"))).click()
+        logging.info("Shipping information filled successfully.")
+    except Exception as e:
+        logging.error(f"Error filling shipping information: {e}")
+        raise
+
+
+def card_expiry(payment_info):
+    """The expiry as typed into the card field (MMYY), from CARD_EXPIRY_MONTH and CARD_EXPIRY_YEAR."""
+    month = (payment_info.get('expiry_month') or "").strip()
+    year = (payment_info.get('expiry_year') or "").strip()
+    if not (month.isdigit() and year.isdigit() and 1 <= int(month) <= 12 and len(year) in (2, 4)):
+        raise ValueError("CARD_EXPIRY_MONTH must be MM and CARD_EXPIRY_YEAR must be YY or YYYY")
+    return f"{int(month):02d}{year[-2:]}"
+
+
+def fill_payment_info(driver, payment_info, timeout=15):
+    """Fill in the payment information."""
+    try:
+        logging.info("Filling payment information")
+        wait = WebDriverWait(driver, timeout)
+        card_fields = [
+            ("card-fields-number-", "number", payment_info['number']),
+            ("card-fields-expiry-", "expiry", card_expiry(payment_info)),
+            ("card-fields-verification_value-", "verification_value", payment_info['cvv'])
+        ]
+        for iframe_prefix, field_id, value in card_fields:
+            driver.switch_to.default_content()
+            wait.until(EC.frame_to_be_available_and_switch_to_it((By.CSS_SELECTOR, f"iframe[id^='{iframe_prefix}']")))
+            fill_field(wait, (By.ID, field_id), value)
+        logging.info("Payment information filled successfully.")
+    except Exception as e:
+        logging.error(f"Error filling payment information: {e}")
+        raise
+    finally:
+        driver.switch_to.default_content()
+
+
+def click_pay_now(driver):
+    driver.switch_to.default_content()
+    driver.find_element(By.ID, "checkout-pay-button").click()
+    logging.info("Clicked Pay Now button")
+
+
+def payment_submitted(driver):
+    """True once the checkout has moved on to processing or the order page."""
+    url = driver.current_url
+    if "processing" in url or "thank" in url:
+        return True
+    return not driver.find_element(By.ID, "checkout-pay-button").is_displayed()
+
+
+def build_checkout_flow(checkout_url, shipping_info, payment_info, detected_at=None, pay_state=None, on_pay=None):
+    """Checkout steps: navigate -> shipping -> payment -> pay -> confirm.
+
+    pay_state['clicked'] is set once Pay Now may have reached the page. on_pay(True) is
+    called just before clicking it and on_pay(False) if the click was certainly not sent.
+    """
+    pay_state = pay_state if pay_state is not None else {}
+    pay_state.setdefault('clicked', False)
+
+    def pay(driver):
+        # Assume the click was sent unless Selenium refused it before dispatching
+        pay_state['clicked'] = True
+        if on_pay:
+            on_pay(True)
+        try:
+            click_pay_now(driver)
+        except CLICK_NOT_SENT_ERRORS:
+            pay_state['clicked'] = False
+            if on_pay:
+                on_pay(False)
+            raise
+        if detected_at is not None:
+            DETECTION_TO_PAY_CLICK.observe(time.monotonic() - detected_at)
+
+    return CheckoutFlow([
+        CheckoutStep(
+            "navigate",
+            action=lambda d: d.get(checkout_url),
+            done=lambda d: "checkout" in d.current_url and d.find_elements(By.ID, "email"),
+            budget=20
+        ),
+        CheckoutStep(
+            "shipping",
+            action=lambda d: fill_shipping_info(d, shipping_info),
+            done=lambda d: d.find_element(By.ID, "TextField5").get_attribute("value"),
+            budget=10
+        ),
+        CheckoutStep(
+            "payment",
+            action=lambda d: fill_payment_info(d, payment_info),
+            done=lambda d: d.find_element(By.ID, "checkout-pay-button").is_enabled(),
+            budget=10
+        ),
+        # Never re-click Pay Now or it could submit the order twice
+        CheckoutStep("pay", action=pay, done=payment_submitted, budget=15, retries=0),
+        CheckoutStep(
+            "confirm",
+            action=lambda d: None,
+            done=lambda d: "thank" in d.current_url,
+            budget=PAY_CONFIRM_TIMEOUT,
+            retries=0
+        )
+    ])
+
+
+def checkout(checkout_url, shipping_info, payment_info, detected_at=None, on_pay=None):
+    """Automate the checkout process, resuming from the failed step on each retry.
+
+    Returns CHECKOUT_CONFIRMED, CHECKOUT_FAILED, or CHECKOUT_UNCONFIRMED once Pay Now may have been clicked.
+    on_pay is passed to build_checkout_flow.
+    """
+    try:
+        driver = driver_pool.acquire()
+    except Exception as e:
+        logging.error(f"Failed to start browser for checkout: {e}")
+        return CHECKOUT_FAILED
+
+    pay_state = {'clicked': False}
+    try:
+        flow = build_checkout_flow(checkout_url, shipping_info, payment_info, detected_at, pay_state, on_pay)
+        start_at = None
+        for attempt in range(1, CHECKOUT_ATTEMPTS + 1):
+            result = flow.run(driver, start_at)
+            for name, seconds in result.timings.items():
+                STAGE_SECONDS.observe(seconds, stage=CHECKOUT_STAGES[name])
+            timings = ", ".join(f"{name} {seconds:.2f}s" for name, seconds in result.timings.items())
+            logging.info(f"Checkout attempt {attempt} step timings: {timings}")
+            if result.success:
+                return CHECKOUT_CONFIRMED
+            logging.warning(f"Attempt {attempt}: checkout stopped at the {result.failed_step} step")
+            capture_diagnostics(driver, f"attempt{attempt}-{result.failed_step}", {
+                'attempt': attempt,
+                'failed_step': result.failed_step,
+                'error': result.error,
+                'step_attempts': result.attempts,
+                'timings': result.timings
+            })
+            if result.failed_step in ("pay", "confirm") and pay_state['clicked']:
+                # The order may already have been submitted, so never pay again, here or on a later sweep
+                logging.error("Pay Now was clicked but the order was not confirmed")
+                return CHECKOUT_UNCONFIRMED
+            start_at = result.failed_step
+
+        logging.error(f"Checkout failed after {attempt} attempts")
+        return CHECKOUT_FAILED
+
+    except Exception as e:
+        logging.error(f"Error during checkout: {e}")
+        capture_diagnostics(driver, "error", {'error': f"{type(e).__name__}: {e}"})
+        return CHECKOUT_UNCONFIRMED if pay_state['clicked'] else CHECKOUT_FAILED
+    finally:
+        driver_pool.release(driver)
+        logging.info(f"Browser timings: {driver_pool.timings()}")
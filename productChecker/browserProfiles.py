@@ -0,0 +1,41 @@
+import logging
+import time
+
+# Resources the checkout form never needs. Payment card iframes are served from
+# checkout.pci.shopifyinc.com / *.shopifycs.com and must not match any of these.
+BLOCKED_RESOURCE_PATTERNS = [
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.avif", "*.ico",
+    "*.woff", "*.woff2", "*.ttf", "*.otf",
+    "*.mp4", "*.webm",
+    "*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*",
+    "*connect.facebook.net*", "*analytics.tiktok.com*", "*static.hotjar.com*",
+    "*static.klaviyo.com*", "*bat.bing.com*", "*monorail-edge.shopifysvc.com*",
+    "*/web-pixels*"
+]
+
+
+def apply_fast_checkout_options(chrome_options):
+    """Return control after DOMContentLoaded and stop Chrome downloading images."""
+    chrome_options.page_load_strategy = 'eager'
+    chrome_options.add_experimental_option("prefs", {"profile.managed_default_content_settings.images": 2})
+    return chrome_options
+
+
+def block_resources(driver, patterns=BLOCKED_RESOURCE_PATTERNS):
+    """Block requests matching the URL patterns for the rest of the driver's life."""
+    driver.execute_cdp_cmd("Network.enable", {})
+    driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": patterns})
+    logging.info(f"Blocking {len(patterns)} resource patterns")
+
+
+def measure_page_ready(driver, url, ready_selector, timeout=30, poll_frequency=0.05):
+    """Load a page and return the seconds until ready_selector matches an enabled element."""
+    script = "var el = document.querySelector(arguments[0]); return !!el && !el.disabled;"
+    start = time.perf_counter()
+    driver.get(url)
+    deadline = start + timeout
+    while not driver.execute_script(script, ready_selector):
+        if time.perf_counter() >= deadline:
+            raise TimeoutError(f"{ready_selector} not ready on {url} within {timeout}s")
+        time.sleep(poll_frequency)
+    return time.perf_counter() - start
@@ -0,0 +1,74 @@
+import logging
+import queue
+import threading
+import time
+
+
+def next_batch(events, batch_window):
+    """Take the next event and any others that arrive within batch_window seconds; None means stop."""
+    first = events.get()
+    if first is None:
+        return None
+    batch = [first]
+    deadline = time.monotonic() + batch_window
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        try:
+            entry = events.get(timeout=remaining)
+        except queue.Empty:
+            break
+        if entry is None:
+            # Leave the stop signal for after this batch
+            events.put(None)
+            break
+        batch.append(entry)
+    return batch
+
+
+class CheckoutQueue:
+    """Checks out detected products on a worker thread, merging detections that arrive together."""
+
+    def __init__(self, handle_batch, batch_window=1.0):
+        self.handle_batch = handle_batch
+        self.batch_window = batch_window
+        self._queue = queue.Queue()
+        self._pending = set()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="checkout-worker", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._queue.put(None)
+
+    def submit(self, key, item):
+        """Queue an item for checkout unless it is already queued or being checked out."""
+        with self._lock:
+            if key in self._pending:
+                return False
+            self._pending.add(key)
+        self._queue.put((key, item))
+        logging.info(f"Queued {key} for checkout")
+        return True
+
+    def depth(self):
+        return self._queue.qsize()
+
+    def _run(self):
+        while True:
+            batch = next_batch(self._queue, self.batch_window)
+            if batch is None:
+                return
+            keys = [key for key, _ in batch]
+            logging.info(f"Checking out {len(batch)} item(s): {', '.join(map(str, keys))}")
+            try:
+                self.handle_batch([item for _, item in batch])
+            except Exception as e:
+                logging.error(f"Checkout worker failed: {e}")
+            finally:
+                with self._lock:
+                    self._pending.difference_update(keys)
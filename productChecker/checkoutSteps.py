@@ -0,0 +1,85 @@
+import logging
+import time
+from dataclasses import dataclass, field
+
+POLL_FREQUENCY = 0.1
+
+# Outcomes of a whole checkout; unconfirmed means Pay Now was clicked but the order page never appeared
+CHECKOUT_CONFIRMED = "confirmed"
+CHECKOUT_UNCONFIRMED = "unconfirmed"
+CHECKOUT_FAILED = "failed"
+
+
+class StepTimeout(Exception):
+    """Raised when a step's completion condition is not met within its budget."""
+
+
+@dataclass
+class CheckoutStep:
+    """One stage of checkout: an action plus the page event that marks it complete."""
+    name: str
+    action: object      # action(driver)
+    done: object        # done(driver) -> bool, polled until true
+    budget: float       # seconds allowed for the done condition after each action
+    retries: int = 1
+
+
+@dataclass
+class CheckoutResult:
+    success: bool
+    failed_step: str = None
+    timings: dict = field(default_factory=dict)
+    attempts: dict = field(default_factory=dict)
+    error: str = None  # last exception raised by the failed step
+
+
+def wait_until(driver, condition, timeout, poll_frequency=POLL_FREQUENCY):
+    """Poll a condition until it is true, treating exceptions as not yet true."""
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            if condition(driver):
+                return
+        except Exception:
+            pass
+        if time.monotonic() >= deadline:
+            raise StepTimeout(f"condition not met within {timeout:.1f}s")
+        time.sleep(poll_frequency)
+
+
+class CheckoutFlow:
+    """Runs checkout steps in order with bounded retries, resumable from any step."""
+
+    def __init__(self, steps):
+        self.steps = steps
+
+    def step_names(self):
+        return [step.name for step in self.steps]
+
+    def run(self, driver, start_at=None):
+        """Run the steps from start_at (or the beginning), stopping at the first step that fails."""
+        names = self.step_names()
+        first = names.index(start_at) if start_at else 0
+        result = CheckoutResult(success=False)
+        for step in self.steps[first:]:
+            if not self._run_step(driver, step, result):
+                result.failed_step = step.name
+                return result
+        result.success = True
+        return result
+
+    def _run_step(self, driver, step, result):
+        start = time.perf_counter()
+        for attempt in range(1, step.retries + 2):
+            result.attempts[step.name] = attempt
+            try:
+                step.action(driver)
+                wait_until(driver, step.done, step.budget)
+                result.timings[step.name] = time.perf_counter() - start
+                logging.info(f"Checkout step {step.name} completed in {result.timings[step.name]:.2f}s")
+                return True
+            except Exception as e:
+                result.error = f"{type(e).__name__}: {e}"
+                logging.warning(f"Checkout step {step.name} attempt {attempt}/{step.retries + 1} failed: {e}")
+        result.timings[step.name] = time.perf_counter() - start
+        return False
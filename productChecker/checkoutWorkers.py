@@ -0,0 +1,234 @@
+import logging
+import multiprocessing
+import queue
+import signal
+import threading
+import time
+from multiprocessing.connection import wait
+
+from .checkoutQueue import next_batch
+from .driverPool import kill_process_tree
+from .metrics import registry
+
+
+def run_worker(worker_id, conn):
+    """Checkout worker process: owns one browser and checks out the batches the monitor sends it."""
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(processName)s - %(levelname)s - %(message)s')
+    # Ctrl+C reaches the whole process group; the monitor decides when workers stop
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    from .bot import browser_checkout, checkout_snapshots
+    from .config import WARM_DRIVERS
+
+    send_lock = threading.Lock()
+
+    def send(*message):
+        with send_lock:
+            conn.send(message)
+
+    # Send checkout metrics back so the monitor's metrics endpoint still reports them
+    registry.forward(lambda name, value, labels: send('metric', name, value, labels))
+    if WARM_DRIVERS:
+        browser_checkout().driver_pool.start()
+    send('ready', None, None, None)
+    try:
+        while True:
+            snapshots = conn.recv()
+            if snapshots is None:
+                return
+            try:
+                # Report each cart before Pay Now is clicked and as soon as it is bought, so the
+                # monitor still records it if this worker is lost before the batch finishes
+                checkout_snapshots(
+                    snapshots,
+                    on_pay=lambda group, url, paying: send('paying', [snapshot.url for snapshot in group], url, paying),
+                    on_purchase=lambda group, url: send('bought', [snapshot.url for snapshot in group], url, None)
+                )
+            except Exception as e:
+                logging.error(f"Checkout worker {worker_id} failed: {e}")
+            send('finished', None, None, None)
+    except EOFError:
+        pass
+    finally:
+        browser_checkout().driver_pool.shutdown()
+        browser_checkout().diagnostics.stop()
+
+
+class CheckoutWorkerPool:
+    """Checks out stock events in separate worker processes, each with its own browser.
+
+    Has the same start/stop/submit interface as CheckoutQueue. Batches are formed
+    here and handed to an idle worker over its own pipe, so a worker that dies, or
+    spends longer than checkout_timeout on one batch, is replaced without touching
+    the others and its products can be queued again. Once a worker reports it is
+    clicking Pay Now it is never timed out, and if it dies that cart is recorded as
+    bought rather than queued again, since the order may have gone through.
+    """
+
+    def __init__(self, workers, on_finished, batch_window=1.0, checkout_timeout=300.0):
+        self.workers = workers
+        self.on_finished = on_finished
+        self.batch_window = batch_window
+        self.checkout_timeout = checkout_timeout
+        self.restarts = 0
+        self._context = multiprocessing.get_context("spawn")
+        self._queue = queue.Queue()
+        self._pending = {}
+        self._workers = {}
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._stopping = threading.Event()
+        self._threads = []
+
+    def start(self):
+        for worker_id in range(self.workers):
+            self._launch(worker_id)
+        for target, name in ((self._dispatch, "checkout-dispatch"), (self._collect, "checkout-results")):
+            thread = threading.Thread(target=target, name=name, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout=30):
+        self._stopping.set()
+        self._queue.put(None)
+        with self._idle:
+            self._idle.notify_all()
+            workers = list(self._workers.values())
+        for worker in workers:
+            try:
+                worker['conn'].send(None)
+            except OSError:
+                pass
+        deadline = time.monotonic() + timeout
+        for worker in workers:
+            worker['process'].join(max(0.0, deadline - time.monotonic()))
+            if worker['process'].is_alive():
+                kill_process_tree(worker['process'].pid)
+        for thread in self._threads:
+            thread.join(2)
+
+    def submit(self, key, item):
+        """Queue an item for checkout unless it is already queued or being checked out."""
+        with self._lock:
+            if key in self._pending:
+                return False
+            self._pending[key] = item
+        self._queue.put((key, item))
+        logging.info(f"Queued {key} for checkout")
+        return True
+
+    def depth(self):
+        with self._lock:
+            return len(self._pending)
+
+    def _launch(self, worker_id):
+        conn, child_conn = self._context.Pipe()
+        process = self._context.Process(target=run_worker, args=(worker_id, child_conn), name=f"checkout-worker-{worker_id}", daemon=True)
+        process.start()
+        child_conn.close()
+        self._workers[worker_id] = {'process': process, 'conn': conn, 'ready': False, 'batch': None, 'started_at': None, 'paying': None}
+
+    def _dispatch(self):
+        """Batch queued items and hand each batch to the next idle worker."""
+        while True:
+            batch = next_batch(self._queue, self.batch_window)
+            if batch is None:
+                return
+            with self._idle:
+                while True:
+                    if self._stopping.is_set():
+                        return
+                    idle = [worker_id for worker_id, worker in self._workers.items() if worker['ready'] and worker['batch'] is None]
+                    if idle:
+                        break
+                    self._idle.wait(1)
+                worker_id = idle[0]
+                worker = self._workers[worker_id]
+                worker['batch'] = [key for key, _ in batch]
+                worker['started_at'] = time.monotonic()
+            logging.info(f"Checkout worker {worker_id} checking out {', '.join(map(str, worker['batch']))}")
+            try:
+                worker['conn'].send([item for _, item in batch])
+            except OSError as e:
+                # The collector notices the dead worker and releases the batch
+                logging.error(f"Failed to hand batch to checkout worker {worker_id}: {e}")
+
+    def _collect(self):
+        """Read results and forwarded metrics from the workers, replacing any that die or hang."""
+        while not self._stopping.is_set():
+            with self._lock:
+                connections = {worker['conn']: worker_id for worker_id, worker in self._workers.items()}
+            for conn in wait(list(connections), timeout=1):
+                worker_id = connections[conn]
+                try:
+                    kind, value, metric_value, labels = conn.recv()
+                except (EOFError, OSError):
+                    self._replace(worker_id, "exited")
+                    continue
+                if kind == 'metric':
+                    registry.record(value, metric_value, labels)
+                elif kind == 'ready':
+                    logging.info(f"Checkout worker {worker_id} ready")
+                    self._set_idle(worker_id)
+                elif kind == 'paying':
+                    # (keys, checkout_url) while Pay Now may have been clicked, None if the click was not sent
+                    self._workers[worker_id]['paying'] = (value, metric_value) if labels else None
+                elif kind == 'bought':
+                    self._workers[worker_id]['paying'] = None
+                    self._finish(value, [(value, metric_value)])
+                elif kind == 'finished':
+                    self._finish(self._set_idle(worker_id), None)
+            now = time.monotonic()
+            for worker_id, worker in list(self._workers.items()):
+                # Never cut off the pay and confirm steps: the order may be going through. A message
+                # still in the pipe (e.g. 'paying') is read on the next pass before deciding.
+                if (worker['batch'] is not None and worker['paying'] is None and not worker['conn'].poll()
+                        and now - worker['started_at'] > self.checkout_timeout):
+                    self._replace(worker_id, f"has been busy for {now - worker['started_at']:.0f}s")
+
+    def _set_idle(self, worker_id):
+        """Mark a worker ready for another batch, returning the keys it was checking out."""
+        with self._idle:
+            worker = self._workers[worker_id]
+            keys = worker['batch'] or []
+            worker['ready'], worker['batch'], worker['paying'] = True, None, None
+            self._idle.notify_all()
+        return keys
+
+    def _finish(self, keys, purchases):
+        """Report each (keys, checkout_url) purchase to on_finished, then release the batch's keys.
+
+        Keys stay pending until purchases are recorded, so a bought product cannot be submitted again in between.
+        """
+        with self._lock:
+            items = {key: self._pending[key] for key in keys if key in self._pending}
+        for purchased_keys, checkout_url in purchases or []:
+            try:
+                self.on_finished([items[key] for key in purchased_keys if key in items], checkout_url)
+            except Exception as e:
+                logging.error(f"Failed to record checkout: {e}")
+        with self._lock:
+            for key in keys:
+                self._pending.pop(key, None)
+
+    def _replace(self, worker_id, reason):
+        if self._stopping.is_set():
+            return
+        with self._lock:
+            worker = self._workers[worker_id]
+            worker['ready'] = False
+        process = worker['process']
+        # Take its chromedriver and browser down with it rather than leave them orphaned
+        kill_process_tree(process.pid)
+        process.join(5)
+        logging.error(f"Checkout worker {worker_id} {reason} (exit code {process.exitcode}), replacing it")
+        worker['conn'].close()
+        purchases = None
+        if worker['paying']:
+            keys, checkout_url = worker['paying']
+            logging.warning(f"Checkout worker {worker_id} was lost after clicking Pay Now, counting {', '.join(map(str, keys))} as bought, check {checkout_url} before buying again")
+            purchases = [worker['paying']]
+        # Let the other products it held be detected and queued again
+        self._finish(worker['batch'] or [], purchases)
+        self.restarts += 1
+        with self._lock:
+            self._launch(worker_id)
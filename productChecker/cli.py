@@ -0,0 +1,22 @@
+import argparse
+import logging
+
+
+def main(argv=None):
+    """Command-line entry point: python -m productChecker [--monitor-only] [--env-file PATH]."""
+    parser = argparse.ArgumentParser(prog="python -m productChecker", description="Watch the store for restocks and check them out.")
+    parser.add_argument("--monitor-only", action="store_true", help="only send restock emails; never add to cart or start Chrome")
+    parser.add_argument("--env-file", help="file to load settings from (default: the nearest .env)")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    # Settings are read when the package modules are first imported, so .env is loaded before importing them
+    from dotenv import load_dotenv
+    load_dotenv(args.env_file)
+    from .config import MONITOR_ONLY
+    from .bot import main as run
+
+    try:
+        run(monitor_only=args.monitor_only or MONITOR_ONLY)
+    except KeyboardInterrupt:
+        logging.info("Stopped")
@@ -0,0 +1,177 @@
+import os
+
+from .httpClient import HTTP_POOL_SIZE
+from .retryPolicy import CircuitBreaker, RetryPolicy
+from .storefront import Storefront, storefront_from_env
+
+# Environment variables
+card_name = os.getenv("CARD_NAME")
+card_number = os.getenv("CARD_NUMBER")
+card_expiry_month = os.getenv("CARD_EXPIRY_MONTH")
+card_expiry_year = os.getenv("CARD_EXPIRY_YEAR")
+card_cvv = os.getenv("CARD_CVV")
+
+shipping_first_name = os.getenv("SHIPPING_FIRST_NAME")
+shipping_last_name = os.getenv("SHIPPING_LAST_NAME")
+shipping_address = os.getenv("SHIPPING_ADDRESS")
+shipping_city = os.getenv("SHIPPING_CITY")
+shipping_postal_code = os.getenv("SHIPPING_POSTCODE")
+shipping_country = os.getenv("SHIPPING_COUNTRY")
+shipping_email = os.getenv("SHIPPING_EMAIL")
+shipping_phone = os.getenv("SHIPPING_PHONE")
+
+# Store to watch and check out from (STORE_URL can point at a local stand-in, see benchmarks/shopifyStandIn.py)
+STORE_URL = os.getenv("STORE_URL", "https://storeuk.taylorswift.com").rstrip("/")
+
+# Products watched on STORE_URL, by handle
+PRODUCT_HANDLES = [
+    "ttpd-typewriter-ornament",
+    "red-taylors-version-guitar-ornament",
+    "acoustic-piano-ornament",
+    "folklore-album-hourglass-ornament",
+    "taylor-swift-midnights-vigilante-chair-ornament",
+    "folklore-album-cardigan-socks"
+    ]
+
+# Polling configuration
+POLL_INTERVAL = float(os.getenv("POLL_INTERVAL", "5"))
+POLL_CONCURRENCY = int(os.getenv("POLL_CONCURRENCY", "8"))
+# Per-product poll intervals as comma-separated handle=seconds pairs; others use POLL_INTERVAL
+PRODUCT_INTERVALS = dict(
+    (handle.strip(), float(seconds)) for handle, seconds in
+    (pair.split("=") for pair in os.getenv("PRODUCT_INTERVALS", "").split(",") if "=" in pair)
+)
+POLL_JITTER = float(os.getenv("POLL_JITTER", "0.1"))
+MAX_POLL_INTERVAL = float(os.getenv("MAX_POLL_INTERVAL", "300"))
+HOST_REQUESTS_PER_SECOND = float(os.getenv("HOST_REQUESTS_PER_SECOND", "5"))
+# Open this many keep-alive connections to the store before the first sweep (0 disables pre-warming)
+PREWARM_CONNECTIONS = int(os.getenv("PREWARM_CONNECTIONS", "2"))
+# Browsers kept started and pre-loaded for checkout (0 starts Chrome only when something is in stock)
+WARM_DRIVERS = int(os.getenv("WARM_DRIVERS", "0"))
+# Warm browsers are probed and measured every DRIVER_CHECK_INTERVAL seconds and, while idle, restarted once over
+# DRIVER_MAX_MEMORY_MB or DRIVER_MAX_AGE seconds; one not answering within DRIVER_PROBE_TIMEOUT is replaced (0 disables a limit)
+DRIVER_MAX_MEMORY_MB = float(os.getenv("DRIVER_MAX_MEMORY_MB", "1500"))
+DRIVER_MAX_AGE = float(os.getenv("DRIVER_MAX_AGE", "3600"))
+DRIVER_CHECK_INTERVAL = float(os.getenv("DRIVER_CHECK_INTERVAL", "30"))
+DRIVER_PROBE_TIMEOUT = float(os.getenv("DRIVER_PROBE_TIMEOUT", "5"))
+# Block images, fonts and analytics and use an eager page load strategy in the checkout browser
+FAST_CHECKOUT = os.getenv("FAST_CHECKOUT", "false").lower() == "true"
+# "batch" sets shipping fields with one script call, "typed" sends keys to each field
+FORM_FILL_MODE = os.getenv("FORM_FILL_MODE", "batch")
+# Checkout attempts, each resuming from the step that failed, and how long to wait for the order page after paying
+CHECKOUT_ATTEMPTS = int(os.getenv("CHECKOUT_ATTEMPTS", "3"))
+PAY_CONFIRM_TIMEOUT = float(os.getenv("PAY_CONFIRM_TIMEOUT", "100"))
+# Read stock from Shopify's /products/<handle>.js payload, scraping the HTML page only as a fallback
+USE_PRODUCT_JSON = os.getenv("USE_PRODUCT_JSON", "true").lower() != "false"
+# Comma-separated collection handles polled in bulk via /collections/<name>/products.json
+COLLECTIONS = [name.strip() for name in os.getenv("COLLECTIONS", "").split(",") if name.strip()]
+COLLECTION_PAGE_SIZE = 250
+COLLECTION_MAX_PAGES = int(os.getenv("COLLECTION_MAX_PAGES", "10"))
+
+# Only poll and send restock emails; never add to cart or start a browser
+MONITOR_ONLY = os.getenv("MONITOR_ONLY", "false").lower() == "true"
+# Separate checkout processes, each with its own browser (0 checks out on a thread in the monitor process)
+CHECKOUT_WORKERS = int(os.getenv("CHECKOUT_WORKERS", "0"))
+# A checkout worker busy on one cart for longer than this many seconds is replaced
+CHECKOUT_WORKER_TIMEOUT = float(os.getenv("CHECKOUT_WORKER_TIMEOUT", "300"))
+# Processes parsing product page HTML, so parsing can use several cores (0 parses on the polling threads)
+PARSE_PROCESSES = int(os.getenv("PARSE_PROCESSES", "0"))
+# Products detected within this many seconds of each other are checked out in one cart
+CHECKOUT_BATCH_WINDOW = float(os.getenv("CHECKOUT_BATCH_WINDOW", "1"))
+# Failed checkout attempts save a screenshot, the page DOM and step timings here (empty disables),
+# deleting the oldest files past DIAGNOSTICS_MAX_MB in total or DIAGNOSTICS_MAX_AGE seconds old
+DIAGNOSTICS_DIR = os.getenv("DIAGNOSTICS_DIR", "diagnostics")
+DIAGNOSTICS_MAX_MB = float(os.getenv("DIAGNOSTICS_MAX_MB", "50"))
+DIAGNOSTICS_MAX_AGE = float(os.getenv("DIAGNOSTICS_MAX_AGE", "604800"))
+
+# Background polling can afford to wait; the cart POST gets short timeouts, fast retries and a tight deadline
+POLL_POLICY = RetryPolicy(
+    "poll", max_attempts=3, base_delay=0.2, max_delay=2.0, timeout=10.0, deadline=15.0,
+    breaker=CircuitBreaker(failure_threshold=5, reset_timeout=30.0)
+)
+CART_POLICY = RetryPolicy(
+    "cart", max_attempts=4, base_delay=0.05, max_delay=0.5, timeout=3.0, deadline=8.0,
+    retry_statuses=frozenset({429, 500, 502, 503, 504}),
+    breaker=CircuitBreaker(failure_threshold=10, reset_timeout=5.0)
+)
+
+# Local metrics endpoint (/metrics and /snapshot.json; 0 disables) and optional snapshot file
+METRICS_PORT = int(os.getenv("METRICS_PORT", "8765"))
+METRICS_SNAPSHOT_INTERVAL = float(os.getenv("METRICS_SNAPSHOT_INTERVAL", "60"))
+METRICS_SNAPSHOT_FILE = os.getenv("METRICS_SNAPSHOT_FILE")
+# Where on-demand CPU profiles and memory snapshots are written, and how many entries each report lists
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+PROFILE_TOP = int(os.getenv("PROFILE_TOP", "30"))
+
+# SQLite file keeping purchases, last stock states and product metadata across restarts (empty disables)
+STATE_FILE = os.getenv("STATE_FILE", "productChecker.db")
+# Cached titles and variant IDs older than this many seconds are ignored at startup
+METADATA_MAX_AGE = float(os.getenv("METADATA_MAX_AGE", "86400"))
+
+# Email configuration
+EMAIL = os.getenv("EMAIL")
+PASSWORD = os.getenv("PASSWORD")
+TO_EMAILS = os.getenv("TO_EMAILS")
+SMTP_SERVER = os.getenv("SMTP_SERVER")
+SMTP_PORT = os.getenv("SMTP_PORT")
+SMTP_STARTTLS = os.getenv("SMTP_STARTTLS", "true").lower() != "false"
+# Restocks within this many seconds are sent as one digest email
+EMAIL_DIGEST_WINDOW = float(os.getenv("EMAIL_DIGEST_WINDOW", "2"))
+EMAIL_QUEUE_SIZE = int(os.getenv("EMAIL_QUEUE_SIZE", "100"))
+
+# Shipping information (the default checkout profile; each storefront can override fields)
+shipping_info = {
+        'country': shipping_country,
+        'email': shipping_email,
+        'first_name': shipping_first_name,
+        'last_name': shipping_last_name,
+        'address1': shipping_address,
+        'address2': '',
+        'city': shipping_city,
+        'postal_code': shipping_postal_code,
+        'phone': shipping_phone
+    }
+
+# Payment information
+payment_info = {
+    'number': card_number,
+    'expiry_month': card_expiry_month,
+    'expiry_year': card_expiry_year,
+    'cvv': card_cvv
+}
+
+# STORE_URL as the first storefront, plus the regional stores named in STOREFRONTS (e.g. us,eu), each read
+# from STORE_<NAME>_URL, STORE_<NAME>_PRODUCTS (comma-separated handles, default PRODUCT_HANDLES) and optionally
+# STORE_<NAME>_REQUESTS_PER_SECOND, _POOL_SIZE, _ACCEPT_LANGUAGE, _COLLECTIONS and _SHIPPING_<FIELD>
+DEFAULT_STOREFRONT = Storefront(
+    name=os.getenv("STORE_NAME", "uk"),
+    base_url=STORE_URL,
+    handles=PRODUCT_HANDLES,
+    requests_per_second=HOST_REQUESTS_PER_SECOND,
+    pool_size=HTTP_POOL_SIZE,
+    accept_language=os.getenv("ACCEPT_LANGUAGE"),
+    collections=COLLECTIONS,
+    shipping_info=shipping_info,
+    payment_info=payment_info
+)
+STOREFRONTS = [DEFAULT_STOREFRONT] + [
+    storefront_from_env(os.environ, name.strip(), DEFAULT_STOREFRONT)
+    for name in os.getenv("STOREFRONTS", "").split(",") if name.strip()
+]
+
+# Every watched product URL across all storefronts
+PRODUCT_URLS = [url for storefront in STOREFRONTS for url in storefront.product_urls]
+
+payment_info_no_env = {
+    'number': '5356 7401 1391 2604',
+    'expiry_month': '03',
+    'expiry_year': '27',
+    'cvv': '941'
+}
+
+INSTOCK_URLS = [
+    f"{STORE_URL}/products/i-love-you-its-ruining-my-life-boxy-cropped-crewneck-1",
+    f"{STORE_URL}/products/the-tortured-poets-department-candle",
+    f"{STORE_URL}/products/1989-taylors-version-seagull-design-tee"
+]
+
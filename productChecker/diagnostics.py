@@ -0,0 +1,106 @@
+import json
+import logging
+import os
+import queue
+import threading
+import time
+
+
+def file_stamp(timestamp):
+    """Local time with milliseconds, for sortable file names: 20240131-142501-042."""
+    return time.strftime("%Y%m%d-%H%M%S", time.localtime(timestamp)) + f"-{int(timestamp * 1000) % 1000:03d}"
+
+
+class DiagnosticsRecorder:
+    """Writes failure screenshots, DOM snapshots and step timings from a background thread.
+
+    record() only queues what the caller already captured, so a checkout retry never
+    waits on disk. Each capture gets timestamped files, and the oldest are deleted once
+    the directory is over max_bytes or they are older than max_age seconds.
+    """
+
+    def __init__(self, directory, max_bytes=50 * 1024 * 1024, max_age=7 * 86400, max_queue=20):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.written = 0
+        self.dropped = 0
+        self.pruned = 0
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="diagnostics", daemon=True)
+                self._thread.start()
+
+    def stop(self, timeout=10):
+        """Write anything still queued, then stop the writer thread."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread:
+            self._queue.put(None)
+            thread.join(timeout)
+
+    def record(self, label, screenshot=None, page_source=None, details=None):
+        """Queue a capture for writing without blocking; returns False if the queue is full."""
+        if not self.directory:
+            return False
+        self.start()
+        try:
+            self._queue.put_nowait((time.time(), label, screenshot, page_source, details))
+            return True
+        except queue.Full:
+            self.dropped += 1
+            logging.warning(f"Diagnostics queue full, dropped capture {label}")
+            return False
+
+    def stats(self):
+        return {'written': self.written, 'dropped': self.dropped, 'pruned': self.pruned, 'queue_depth': self._queue.qsize()}
+
+    def _run(self):
+        while True:
+            entry = self._queue.get()
+            if entry is None:
+                return
+            try:
+                self._write(*entry)
+                self._prune()
+            except OSError as e:
+                logging.error(f"Failed to write diagnostics: {e}")
+
+    def _write(self, captured_at, label, screenshot, page_source, details):
+        os.makedirs(self.directory, exist_ok=True)
+        base = os.path.join(self.directory, f"{file_stamp(captured_at)}-{os.getpid()}-{label}")
+        if screenshot:
+            with open(f"{base}.png", "wb") as f:
+                f.write(screenshot)
+        if page_source:
+            with open(f"{base}.html", "w", encoding="utf-8") as f:
+                f.write(page_source)
+        with open(f"{base}.json", "w", encoding="utf-8") as f:
+            json.dump(dict(details or {}, label=label, captured_at=captured_at), f, indent=2, default=str)
+        self.written += 1
+        logging.info(f"Saved diagnostics to {base}.*")
+
+    def _prune(self):
+        """Delete captures past max_age, then the oldest until the directory fits in max_bytes."""
+        files = []
+        for entry in os.scandir(self.directory):
+            if entry.is_file():
+                stat = entry.stat()
+                files.append((stat.st_mtime, stat.st_size, entry.path))
+        files.sort()
+        total = sum(size for _, size, _ in files)
+        oldest = time.time() - self.max_age if self.max_age else None
+        for mtime, size, path in files:
+            if not ((oldest is not None and mtime < oldest) or (self.max_bytes and total > self.max_bytes)):
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            self.pruned += 1
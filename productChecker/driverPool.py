@@ -0,0 +1,316 @@
+import logging
+import os
+import signal
+import threading
+import time
+from collections import deque
+
+
+def process_tree(root_pid):
+    """Return a process and all of its descendants, read from /proc (empty where /proc is unavailable)."""
+    children = {}
+    try:
+        entries = os.listdir("/proc")
+    except OSError:
+        return []
+    for entry in entries:
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        children.setdefault(ppid, []).append(int(entry))
+    pids = []
+    pending = [root_pid]
+    while pending:
+        pid = pending.pop()
+        pids.append(pid)
+        pending.extend(children.get(pid, []))
+    return pids
+
+
+def kill_process_tree(root_pid):
+    """SIGKILL a process and its descendants, children first."""
+    for pid in reversed(process_tree(root_pid)):
+        try:
+            os.kill(pid, signal.SIGKILL)
+        except OSError:
+            pass
+
+
+def tree_rss_mb(root_pid):
+    """Resident memory of a process tree in MB, or None if it cannot be read."""
+    total = 0
+    found = False
+    for pid in process_tree(root_pid):
+        try:
+            with open(f"/proc/{pid}/status") as f:
+                total += int(f.read().split("VmRSS:")[1].split()[0])
+            found = True
+        except (OSError, IndexError, ValueError):
+            pass
+    return total / 1024 if found else None
+
+
+def call_with_timeout(function, timeout):
+    """Run function on a helper thread; return (finished, result or exception)."""
+    outcome = {}
+
+    def run():
+        try:
+            outcome['result'] = function()
+        except Exception as e:
+            outcome['error'] = e
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    thread.join(timeout)
+    if thread.is_alive():
+        return False, None
+    return 'result' in outcome, outcome.get('result', outcome.get('error'))
+
+
+class DriverPool:
+    """Starts WebDrivers lazily or keeps a number of warm ones ready for checkout.
+
+    Warm drivers are supervised: a cheap script probe checks each one still answers
+    and its browser's memory is sampled. Idle drivers over max_memory_mb or older
+    than max_age seconds are recycled, and a driver that fails its probe is replaced
+    before it is handed to a checkout.
+    """
+
+    def __init__(self, create_driver, warm_size=0, warm_urls=(), page_load_timeout=20, max_memory_mb=None,
+                 max_age=None, check_interval=30.0, probe_timeout=5.0, on_recycle=None, on_sample=None):
+        self.create_driver = create_driver
+        self.warm_size = warm_size
+        self.warm_urls = list(warm_urls)
+        self.page_load_timeout = page_load_timeout
+        self.max_memory_mb = max_memory_mb
+        self.max_age = max_age
+        self.check_interval = check_interval
+        self.probe_timeout = probe_timeout
+        self.on_recycle = on_recycle  # on_recycle(reason)
+        self.on_sample = on_sample    # on_sample(health) after each supervision pass
+        self.start_times = []
+        self.first_navigation_times = []
+        self.recycles = {}
+        self._idle = []
+        self._drivers = {}  # id(driver) -> {'started_at', 'pid', 'samples', 'probe_seconds'}
+        self._starting = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._supervisor = None
+
+    def start(self):
+        """Begin warming drivers in the background so startup does not delay polling."""
+        self._replenish()
+        if self.warm_size and self._supervisor is None and self.check_interval:
+            self._stop.clear()
+            self._supervisor = threading.Thread(target=self._supervise, name="driver-supervisor", daemon=True)
+            self._supervisor.start()
+
+    def acquire(self):
+        """Return a ready driver, replacing a warm one that no longer answers, or starting one now."""
+        driver = None
+        while driver is None:
+            with self._lock:
+                driver = self._idle.pop() if self._idle else None
+            if driver is None:
+                logging.info("No warm driver available, starting one")
+                driver = self._launch()
+            else:
+                reason = self._probe(driver)
+                if reason:
+                    self._recycle(driver, reason)
+                    driver = None
+        self._replenish()
+        return driver
+
+    def release(self, driver):
+        """Return a driver after use, keeping it warm or quitting it in lazy mode."""
+        with self._lock:
+            if len(self._idle) < self.warm_size and not self._stop.is_set():
+                self._idle.append(driver)
+                return
+        self._quit(driver)
+
+    def shutdown(self):
+        """Stop supervising and quit every idle driver."""
+        self._stop.set()
+        self._supervisor = None
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for driver in idle:
+            self._quit(driver)
+
+    def timings(self):
+        """Return average browser start and first navigation times in seconds."""
+        def average(values):
+            return sum(values) / len(values) if values else None
+        return {
+            'drivers_started': len(self.start_times),
+            'avg_start_time': average(self.start_times),
+            'avg_first_navigation_time': average(self.first_navigation_times)
+        }
+
+    def health(self):
+        """Return browser memory, memory growth, probe time and recycle counts for the supervised drivers."""
+        with self._lock:
+            drivers = list(self._drivers.values())
+            idle = len(self._idle)
+        now = time.monotonic()
+        memory = [info['samples'][-1][1] for info in drivers if info['samples']]
+        growth = [rate for rate in (memory_growth(info['samples']) for info in drivers) if rate is not None]
+        probes = [info['probe_seconds'] for info in drivers if info['probe_seconds'] is not None]
+        return {
+            'drivers': len(drivers),
+            'idle': idle,
+            'memory_mb_total': round(sum(memory), 1) if memory else None,
+            'memory_mb_max': round(max(memory), 1) if memory else None,
+            'memory_growth_mb_per_hour': round(max(growth), 1) if growth else None,
+            'oldest_seconds': round(max(now - info['started_at'] for info in drivers), 1) if drivers else None,
+            'probe_seconds_max': round(max(probes), 3) if probes else None,
+            'recycles': dict(self.recycles)
+        }
+
+    def _launch(self, preload=False):
+        start = time.perf_counter()
+        driver = self.create_driver()
+        driver.set_page_load_timeout(self.page_load_timeout)
+        start_time = time.perf_counter() - start
+        self.start_times.append(start_time)
+        service = getattr(driver, 'service', None)
+        process = getattr(service, 'process', None)
+        with self._lock:
+            self._drivers[id(driver)] = {
+                'started_at': time.monotonic(),
+                'pid': getattr(process, 'pid', None),
+                'samples': deque(maxlen=120),  # (time.monotonic(), rss_mb)
+                'probe_seconds': None
+            }
+        logging.info(f"Browser started in {start_time:.2f}s")
+
+        # Warm drivers load each store once so DNS, TLS, caches and cookies are hot for checkout;
+        # a checkout waiting on a new driver goes straight to its cart instead
+        for warm_url in self.warm_urls if preload else []:
+            start = time.perf_counter()
+            try:
+                driver.get(warm_url)
+                navigation_time = time.perf_counter() - start
+                self.first_navigation_times.append(navigation_time)
+                logging.info(f"Pre-loaded {warm_url} in {navigation_time:.2f}s")
+            except Exception as e:
+                logging.warning(f"Failed to pre-load {warm_url}: {e}")
+        return driver
+
+    def _replenish(self):
+        if self._stop.is_set():
+            return
+        with self._lock:
+            missing = self.warm_size - len(self._idle) - self._starting
+            self._starting += max(missing, 0)
+        for _ in range(missing):
+            threading.Thread(target=self._warm_one, daemon=True).start()
+
+    def _warm_one(self):
+        try:
+            driver = self._launch(preload=True)
+        except Exception as e:
+            logging.error(f"Failed to start warm driver: {e}")
+            with self._lock:
+                self._starting -= 1
+            return
+        with self._lock:
+            self._starting -= 1
+            keep = not self._stop.is_set()
+            if keep:
+                self._idle.append(driver)
+        if not keep:
+            self._quit(driver)
+
+    def _probe(self, driver):
+        """Run a trivial script on a driver; return "hung" or "dead" if it fails, None if it answered."""
+        start = time.perf_counter()
+        finished, result = call_with_timeout(lambda: driver.execute_script("return document.readyState"), self.probe_timeout)
+        info = self._drivers.get(id(driver))
+        if info is not None:
+            info['probe_seconds'] = time.perf_counter() - start
+        if finished:
+            return None
+        if isinstance(result, Exception):
+            logging.warning(f"Browser failed a liveness probe: {result}")
+            return "dead"
+        logging.warning(f"Browser did not answer a liveness probe within {self.probe_timeout:g}s")
+        return "hung"
+
+    def _sample(self, driver):
+        info = self._drivers.get(id(driver))
+        if info is None or info['pid'] is None:
+            return None
+        rss = tree_rss_mb(info['pid'])
+        if rss is not None:
+            info['samples'].append((time.monotonic(), rss))
+        return rss
+
+    def _supervise(self):
+        while not self._stop.wait(self.check_interval):
+            with self._lock:
+                idle = list(self._idle)
+            # Check one driver at a time so the others stay available to acquire()
+            for driver in idle:
+                with self._lock:
+                    if driver not in self._idle:
+                        continue
+                    self._idle.remove(driver)
+                reason = self._check(driver)
+                if reason:
+                    self._recycle(driver, reason)
+                else:
+                    self.release(driver)
+            self._replenish()
+            health = self.health()
+            logging.debug(f"Browser health: {health}")
+            if self.on_sample:
+                self.on_sample(health)
+
+    def _check(self, driver):
+        """Return why an idle driver should be recycled, or None if it is healthy."""
+        reason = self._probe(driver)
+        if reason:
+            return reason
+        rss = self._sample(driver)
+        if self.max_memory_mb and rss is not None and rss > self.max_memory_mb:
+            logging.info(f"Browser using {rss:.0f} MB, over the {self.max_memory_mb:.0f} MB limit")
+            return "memory"
+        info = self._drivers.get(id(driver))
+        if self.max_age and info and time.monotonic() - info['started_at'] > self.max_age:
+            return "age"
+        return None
+
+    def _recycle(self, driver, reason):
+        logging.info(f"Recycling browser ({reason})")
+        self.recycles[reason] = self.recycles.get(reason, 0) + 1
+        if self.on_recycle:
+            self.on_recycle(reason)
+        self._quit(driver)
+
+    def _quit(self, driver):
+        with self._lock:
+            info = self._drivers.pop(id(driver), None)
+        finished, error = call_with_timeout(driver.quit, self.probe_timeout * 2)
+        if finished:
+            return
+        logging.warning(f"Error quitting driver: {error or 'timed out'}")
+        # A hung browser may ignore quit, so kill its process tree
+        if info and info['pid']:
+            kill_process_tree(info['pid'])
+
+
+def memory_growth(samples):
+    """Memory growth in MB per hour between the oldest and newest samples, or None with too little history."""
+    if len(samples) < 2 or samples[-1][0] - samples[0][0] < 1:
+        return None
+    (first_time, first_rss), (last_time, last_rss) = samples[0], samples[-1]
+    return (last_rss - first_rss) / (last_time - first_time) * 3600
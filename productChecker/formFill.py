@@ -0,0 +1,44 @@
+import logging
+
+# Sets every field in one round trip. Values go through the native value setter and
+# fire input/change events so framework-controlled inputs pick them up. Selects
+# match an option by value or visible text.
+FILL_SCRIPT = """
+var fields = arguments[0], missing = [];
+for (var id in fields) {
+    var el = document.getElementById(id);
+    if (!el) { missing.push(id); continue; }
+    var value = fields[id];
+    if (el.tagName === 'SELECT') {
+        var wanted = String(value).toLowerCase(), found = false;
+        for (var i = 0; i < el.options.length; i++) {
+            var option = el.options[i];
+            if (option.value.toLowerCase() === wanted || option.text.trim().toLowerCase() === wanted) {
+                el.selectedIndex = i;
+                found = true;
+                break;
+            }
+        }
+        if (!found) { missing.push(id); continue; }
+    } else {
+        var proto = el.tagName === 'TEXTAREA' ? HTMLTextAreaElement.prototype : HTMLInputElement.prototype;
+        Object.getOwnPropertyDescriptor(proto, 'value').set.call(el, value);
+    }
+    el.dispatchEvent(new Event('input', {bubbles: true}));
+    el.dispatchEvent(new Event('change', {bubbles: true}));
+    el.dispatchEvent(new Event('blur'));
+}
+return missing;
+"""
+
+
+class FieldsNotFilled(Exception):
+    """Raised when some fields of a batched fill could not be found or matched."""
+
+
+def fill_fields(driver, fields):
+    """Fill a dict of element ID -> value with a single script execution."""
+    missing = driver.execute_script(FILL_SCRIPT, fields)
+    if missing:
+        raise FieldsNotFilled(f"Could not fill fields: {', '.join(missing)}")
+    logging.info(f"Filled {len(fields)} fields in one script call")
@@ -0,0 +1,83 @@
+import logging
+import os
+import threading
+import time
+from http.cookiejar import DefaultCookiePolicy
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Connections kept open per host; should be at least the number of concurrent pollers
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "16"))
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Accept-Language': 'en-GB,en;q=0.9',
+    'Connection': 'keep-alive'
+}
+
+_session = None
+_session_lock = threading.Lock()
+# Hosts with their own session: host -> {'pool_size', 'headers', 'session'}
+_host_sessions = {}
+
+
+def create_session(pool_size=HTTP_POOL_SIZE, headers=None):
+    """Create a keep-alive session with a sized connection pool per host."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    session.headers.update(DEFAULT_HEADERS)
+    session.headers.update(headers or {})
+    # Every request is independent; carts are tracked through the response cookies only
+    session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+    return session
+
+
+def configure_host(url, pool_size=HTTP_POOL_SIZE, headers=None):
+    """Give a URL's host its own session, with its own connection pool size and extra headers."""
+    with _session_lock:
+        _host_sessions[urlsplit(url).netloc] = {'pool_size': pool_size, 'headers': headers or {}, 'session': None}
+
+
+def get_session(url=None):
+    """Return the session for a URL's host if it has its own, otherwise the shared one."""
+    global _session
+    host = _host_sessions.get(urlsplit(url).netloc) if url else None
+    if host is not None:
+        if host['session'] is None:
+            with _session_lock:
+                if host['session'] is None:
+                    host['session'] = create_session(host['pool_size'], host['headers'])
+                    logging.info(f"HTTP session for {urlsplit(url).netloc} created with {host['pool_size']} connections")
+        return host['session']
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = create_session()
+                logging.info(f"HTTP session created with {HTTP_POOL_SIZE} connections per host")
+    return _session
+
+
+def prewarm(url, connections=1, timeout=10):
+    """Open keep-alive connections to a URL's origin ahead of time so later requests skip the handshake."""
+    parts = urlsplit(url)
+    origin = f"{parts.scheme}://{parts.netloc}/"
+    session = get_session(url)
+    pool_size = _host_sessions.get(parts.netloc, {}).get('pool_size', HTTP_POOL_SIZE)
+    start = time.perf_counter()
+
+    def warm():
+        try:
+            session.head(origin, timeout=timeout, allow_redirects=False)
+        except requests.exceptions.RequestException as e:
+            logging.warning(f"Failed to pre-warm connection to {origin}: {e}")
+
+    threads = [threading.Thread(target=warm, daemon=True) for _ in range(min(connections, pool_size))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    logging.info(f"Pre-warmed {len(threads)} connections to {origin} in {time.perf_counter() - start:.2f}s")
@@ -0,0 +1,283 @@
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+
+def _label_key(labels):
+    return tuple(sorted(labels.items()))
+
+
+def _snapshot_key(key):
+    return ",".join(f"{name}={value}" for name, value in key) or "total"
+
+
+def _format_labels(key, extra=()):
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{value}"' for name, value in pairs) + "}"
+
+
+class Counter:
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help_text = help_text
+        self._values = {}
+        self._lock = threading.Lock()
+        self.listener = None
+
+    def inc(self, amount=1, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+        if self.listener:
+            self.listener(self.name, amount, labels)
+
+    record = inc
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(key)} {value}")
+        return lines
+
+    def snapshot(self):
+        with self._lock:
+            return {_snapshot_key(key): value for key, value in sorted(self._values.items())}
+
+
+class Gauge:
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help_text = help_text
+        self._values = {}
+        self._lock = threading.Lock()
+        self.listener = None
+
+    def set(self, value, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = value
+        if self.listener:
+            self.listener(self.name, value, labels)
+
+    record = set
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} gauge"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(key)} {value}")
+        return lines
+
+    def snapshot(self):
+        with self._lock:
+            return {_snapshot_key(key): value for key, value in sorted(self._values.items())}
+
+
+class Histogram:
+    def __init__(self, name, help_text, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+        self.listener = None
+
+    def observe(self, value, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = {'counts': [0] * len(self.buckets), 'count': 0, 'sum': 0.0, 'max': 0.0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series['counts'][i] += 1
+            series['count'] += 1
+            series['sum'] += value
+            series['max'] = max(series['max'], value)
+        if self.listener:
+            self.listener(self.name, value, labels)
+
+    record = observe
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe how long the with-block takes, in seconds."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, series in sorted(self._series.items()):
+                for bound, count in zip(self.buckets, series['counts']):
+                    lines.append(f"{self.name}_bucket{_format_labels(key, [('le', bound)])} {count}")
+                lines.append(f"{self.name}_bucket{_format_labels(key, [('le', '+Inf')])} {series['count']}")
+                lines.append(f"{self.name}_sum{_format_labels(key)} {series['sum']}")
+                lines.append(f"{self.name}_count{_format_labels(key)} {series['count']}")
+        return lines
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                _snapshot_key(key): {
+                    'count': series['count'],
+                    'sum': round(series['sum'], 6),
+                    'avg': round(series['sum'] / series['count'], 6) if series['count'] else None,
+                    'max': round(series['max'], 6)
+                }
+                for key, series in sorted(self._series.items())
+            }
+
+
+class Registry:
+    """Holds every metric and renders them as Prometheus text or a JSON-friendly dict."""
+
+    def __init__(self, prefix=""):
+        self.prefix = prefix
+        self._metrics = []
+        self._listener = None
+
+    def counter(self, name, help_text):
+        return self._add(Counter(self.prefix + name, help_text))
+
+    def gauge(self, name, help_text):
+        return self._add(Gauge(self.prefix + name, help_text))
+
+    def histogram(self, name, help_text, buckets=DEFAULT_BUCKETS):
+        return self._add(Histogram(self.prefix + name, help_text, buckets))
+
+    def _add(self, metric):
+        metric.listener = self._listener
+        self._metrics.append(metric)
+        return metric
+
+    def forward(self, listener):
+        """Also pass every increment and observation to listener(name, value, labels), e.g. to another process."""
+        self._listener = listener
+        for metric in self._metrics:
+            metric.listener = listener
+
+    def record(self, name, value, labels):
+        """Apply an increment or observation forwarded from another registry."""
+        for metric in self._metrics:
+            if metric.name == name:
+                metric.record(value, **labels)
+                return
+
+    def render_prometheus(self):
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self):
+        return {'timestamp': time.time(), 'metrics': {metric.name: metric.snapshot() for metric in self._metrics}}
+
+
+registry = Registry(prefix="productchecker_")
+
+
+class MetricsServer:
+    """Serves /metrics (Prometheus text) and /snapshot.json (refreshed periodically) on a local port.
+
+    Each periodic snapshot is also written to snapshot_file, if given. With a profiler,
+    GET /profile reports its status and POST /profile/start, /profile/stop and
+    /profile/snapshot control it.
+    """
+
+    def __init__(self, registry, port, host="127.0.0.1", snapshot_interval=60.0, snapshot_file=None, profiler=None):
+        self.registry = registry
+        self.profiler = profiler
+        self.snapshot_interval = snapshot_interval
+        self.snapshot_file = snapshot_file
+        self.latest_snapshot = registry.snapshot()
+        self._stop = threading.Event()
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+
+    @property
+    def port(self):
+        return self._server.server_address[1]
+
+    def start(self):
+        threading.Thread(target=self._server.serve_forever, name="metrics-http", daemon=True).start()
+        threading.Thread(target=self._snapshot_loop, name="metrics-snapshot", daemon=True).start()
+        logging.info(f"Serving metrics on http://127.0.0.1:{self.port}/metrics")
+
+    def stop(self):
+        self._stop.set()
+        self._server.shutdown()
+
+    def take_snapshot(self):
+        self.latest_snapshot = self.registry.snapshot()
+        if self.snapshot_file:
+            temp_file = f"{self.snapshot_file}.tmp"
+            with open(temp_file, "w") as f:
+                json.dump(self.latest_snapshot, f, indent=2)
+            os.replace(temp_file, self.snapshot_file)
+
+    def _snapshot_loop(self):
+        while not self._stop.wait(self.snapshot_interval):
+            try:
+                self.take_snapshot()
+            except OSError as e:
+                logging.warning(f"Failed to write metrics snapshot: {e}")
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path == "/metrics":
+                    body = server.registry.render_prometheus().encode()
+                    content_type = "text/plain; version=0.0.4"
+                elif self.path == "/snapshot.json":
+                    body = json.dumps(server.latest_snapshot).encode()
+                    content_type = "application/json"
+                elif self.path == "/profile" and server.profiler:
+                    body = json.dumps(server.profiler.status()).encode()
+                    content_type = "application/json"
+                else:
+                    self.send_error(404)
+                    return
+                self.respond(body, content_type)
+
+            def do_POST(self):
+                actions = {
+                    "/profile/start": lambda: {'started': server.profiler.start()},
+                    "/profile/stop": lambda: {'files': server.profiler.stop()},
+                    "/profile/snapshot": lambda: {'files': server.profiler.snapshot()}
+                }
+                if not server.profiler or self.path not in actions:
+                    self.send_error(404)
+                    return
+                try:
+                    result = actions[self.path]()
+                except OSError as e:
+                    self.send_error(500, str(e))
+                    return
+                self.respond(json.dumps(dict(result, **server.profiler.status())).encode(), "application/json")
+
+            def respond(self, body, content_type):
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
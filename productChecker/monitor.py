@@ -0,0 +1,570 @@
+import time
+import requests
+import logging
+import hashlib
+import signal
+import threading
+import multiprocessing
+from dataclasses import dataclass, field, replace
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from .config import (
+    STOREFRONTS, USE_PRODUCT_JSON, COLLECTION_PAGE_SIZE, COLLECTION_MAX_PAGES,
+    POLL_POLICY, CART_POLICY, STATE_FILE, METADATA_MAX_AGE, PROFILE_DIR, PROFILE_TOP,
+    EMAIL, PASSWORD, TO_EMAILS, SMTP_SERVER, SMTP_PORT, SMTP_STARTTLS, EMAIL_DIGEST_WINDOW, EMAIL_QUEUE_SIZE
+)
+from .productExtractor import extract_product_page
+from .httpClient import configure_host, get_session
+from .notifier import NotificationDispatcher
+from .profiler import Profiler
+from .metrics import registry
+from .retryPolicy import CircuitOpenError, send_with_policy
+from .stateStore import StateStore
+from .stockIndex import StockIndex
+from .storefront import group_by_storefront, storefronts_by_host
+
+
+# URLs of products that have already been bought
+notified_products = set()
+
+# Each storefront polls and adds to cart over its own connection pool
+for storefront in STOREFRONTS:
+    configure_host(storefront.base_url, storefront.pool_size, storefront.headers())
+storefront_hosts = storefronts_by_host(STOREFRONTS)
+
+# Per-URL validators (ETag / Last-Modified), body hash and last parse result for conditional polling
+response_cache = {}
+# Parse results served from response_cache (hits) versus freshly parsed responses (misses)
+parse_stats = {'hits': 0, 'misses': 0}
+parse_stats_lock = threading.Lock()
+
+# Status code and Retry-After of the last request made on each polling thread
+fetch_status = threading.local()
+
+# Instrumentation
+STAGE_SECONDS = registry.histogram("stage_seconds", "Time spent in each polling and checkout stage")
+POLLS = registry.counter("polls_total", "Product stock checks")
+POLL_ERRORS = registry.counter("poll_errors_total", "Product stock checks that failed")
+STOCK_TRANSITIONS = registry.counter("stock_transitions_total", "Products changing between in and out of stock")
+VARIANT_EVENTS = registry.counter("variant_events_total", "Variants coming into or going out of stock, or newly listed")
+CART_ADDS = registry.counter("cart_adds_total", "cart/add.js requests by result")
+CHECKOUTS = registry.counter("checkouts_total", "Checkouts by result")
+DETECTION_TO_CART = registry.histogram("detection_to_cart_seconds", "Time from in-stock detection to the item being in a cart")
+DETECTION_TO_PAY_CLICK = registry.histogram("detection_to_pay_click_seconds", "Time from in-stock detection to clicking Pay Now")
+DRIVER_RECYCLES = registry.counter("driver_recycles_total", "Checkout browsers replaced, by reason (memory, age, hung, dead)")
+DRIVER_MEMORY = registry.gauge("driver_memory_megabytes", "Resident memory of the checkout browsers, total and largest")
+DRIVER_MEMORY_GROWTH = registry.gauge("driver_memory_growth_megabytes_per_hour", "Fastest memory growth among the checkout browsers")
+DRIVER_PROBE_SECONDS = registry.histogram("driver_probe_seconds", "Time for a checkout browser to answer a liveness probe")
+
+# Last in-stock variant ID seen for each product URL, so add_items_to_cart can skip the page fetch
+variant_id_cache = {}
+
+# Optional process pool that parses product page HTML off the polling threads
+parse_pool = None
+parse_processes = 0
+parse_pool_lock = threading.Lock()
+
+state_store = StateStore(STATE_FILE)
+# Title, variants and save time last written to state_store for each product URL
+product_metadata = {}
+# Variant availability and price for every polled product, reporting only what changes
+stock_index = StockIndex()
+# On-demand CPU and memory profiling of the polling threads, off until toggled
+profiler = Profiler(PROFILE_DIR, top=PROFILE_TOP)
+
+
+@dataclass
+class ProductSnapshot:
+    """Result of one stock check, handed straight to add_items_to_cart when the product is in stock."""
+    url: str
+    name: str = None
+    in_stock: bool = None
+    variants: list = field(default_factory=list)  # (variant_id, available) pairs
+    prices: dict = field(default_factory=dict)  # variant_id -> price as listed by the store
+    status: int = None
+    retry_after: float = None
+    checked_at: float = None  # time.monotonic() when the check finished
+
+    @property
+    def variant_id(self):
+        """Return the first available variant ID."""
+        for variant_id, available in self.variants:
+            if available:
+                return variant_id
+        return None
+
+
+def storefront_for_url(url):
+    """Return the storefront a URL belongs to, defaulting to the first one."""
+    return storefront_hosts.get(urlsplit(url).netloc, STOREFRONTS[0])
+
+def ignore_interrupts():
+    """Leave Ctrl+C to the monitor, which shuts the parse pool down itself."""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+def start_parse_pool(processes):
+    """Parse product pages in separate processes so parsing is not limited to one core."""
+    global parse_pool, parse_processes
+    parse_processes = processes
+    parse_pool = ProcessPoolExecutor(max_workers=processes, mp_context=multiprocessing.get_context("spawn"), initializer=ignore_interrupts)
+    logging.info(f"Parsing product pages in {processes} processes")
+
+def stop_parse_pool():
+    global parse_pool
+    if parse_pool:
+        parse_pool.shutdown(wait=False, cancel_futures=True)
+        parse_pool = None
+
+def extract_page(content):
+    """Extract a product page, in the parse pool when one is running."""
+    pool = parse_pool
+    if pool:
+        try:
+            return pool.submit(extract_product_page, content).result()
+        except BrokenProcessPool:
+            restart_parse_pool(pool)
+    return extract_product_page(content)
+
+def restart_parse_pool(broken):
+    """Replace a parse pool whose process died; this page is parsed on the polling thread instead."""
+    with parse_pool_lock:
+        if parse_pool is not broken:
+            return
+        logging.error("A parse process died, restarting the parse pool")
+        broken.shutdown(wait=False)
+        start_parse_pool(parse_processes)
+
+def parse_retry_after(value):
+    """Return a Retry-After header (seconds or HTTP date) as seconds from now."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+def fetch_url(url, conditional=False, policy=POLL_POLICY):
+    headers = {}
+    cached = response_cache.get(url) if conditional else None
+    if cached:
+        if cached['etag']:
+            headers['If-None-Match'] = cached['etag']
+        if cached['last_modified']:
+            headers['If-Modified-Since'] = cached['last_modified']
+    fetch_status.code = None
+    fetch_status.retry_after = None
+    try:
+        with STAGE_SECONDS.time(stage="fetch"):
+            response = send_with_policy(
+                policy, url,
+                lambda timeout: get_session(url).get(url, headers=headers, timeout=timeout)
+            )
+        fetch_status.code = response.status_code
+        fetch_status.retry_after = parse_retry_after(response.headers.get('Retry-After'))
+        response.raise_for_status()
+        if conditional:
+            mark_unchanged(url, response)
+        return response
+    except CircuitOpenError as e:
+        logging.warning(str(e))
+        return None
+    except requests.exceptions.RequestException as e:
+        logging.error(f"Request failed: {e}")
+        return None
+
+def mark_unchanged(url, response):
+    """Flag a response as unchanged on 304 or an identical body, and store its validators."""
+    cached = response_cache.get(url)
+    if response.status_code == 304:
+        response.unchanged = cached is not None
+        return
+    digest = hashlib.sha256(response.content).hexdigest()
+    response.unchanged = cached is not None and cached['digest'] == digest
+    response_cache[url] = {
+        'etag': response.headers.get('ETag'),
+        'last_modified': response.headers.get('Last-Modified'),
+        'digest': digest,
+        'result': cached['result'] if response.unchanged else None
+    }
+
+def fetch_parsed(url, parse):
+    """Fetch a URL conditionally and parse it, reusing the last result when the content is unchanged."""
+    response = fetch_url(url, conditional=True)
+    if not response:
+        return None
+    cached = response_cache.get(url)
+    if response.unchanged and cached['result'] is not None:
+        with parse_stats_lock:
+            parse_stats['hits'] += 1
+        return cached['result']
+    with parse_stats_lock:
+        parse_stats['misses'] += 1
+    if response.status_code == 304:
+        # Nothing to parse, so drop the validators and fetch the full body next time
+        response_cache.pop(url, None)
+        return None
+    with STAGE_SECONDS.time(stage="parse"):
+        result = parse(url, response)
+    if result is None:
+        response_cache.pop(url, None)
+    elif cached:
+        cached['result'] = result
+    return result
+
+def product_json_url(url):
+    """Return the Shopify product JSON URL (/products/<handle>.js) for a product page URL."""
+    return url.split('?')[0].rstrip('/') + '.js'
+
+def parse_product_json(url, response):
+    """Decode and validate a product JSON response."""
+    try:
+        data = response.json()
+    except ValueError as e:
+        logging.warning(f"Invalid product JSON for {url}: {e}")
+        return None
+    if not isinstance(data, dict) or 'variants' not in data:
+        logging.warning(f"Unexpected product JSON for {url}")
+        return None
+    return data
+
+def fetch_product_json(url):
+    """Fetch the compact product JSON for a product page URL."""
+    return fetch_parsed(product_json_url(url), parse_product_json)
+
+def get_variant_availability(data):
+    """Return (variant_id, available) pairs from a product JSON payload."""
+    return [(str(variant['id']), bool(variant.get('available'))) for variant in data.get('variants', [])]
+
+def get_variant_prices(data):
+    """Return variant_id -> price from a product JSON payload."""
+    return {str(variant['id']): variant.get('price') for variant in data.get('variants', [])}
+
+def get_variant_id_from_json(data):
+    """Return the first available variant ID from a product JSON payload."""
+    for variant_id, available in get_variant_availability(data):
+        if available:
+            return variant_id
+    return None
+
+def check_product_json(url):
+    """Check stock using the product JSON endpoint."""
+    data = fetch_product_json(url)
+    if not data:
+        return ProductSnapshot(url)
+    variants = get_variant_availability(data)
+    return ProductSnapshot(url, data.get('title'), any(available for _, available in variants), variants, get_variant_prices(data))
+
+def parse_product_page(url, response):
+    """Read the product name, stock state and variants from a product page."""
+    page = extract_page(response.content)
+    if page.title is None:
+        logging.warning(f"Product title not found on {url}")
+        return None
+    prices = {}
+    if page.product_json:
+        variants = get_variant_availability(page.product_json)
+        prices = get_variant_prices(page.product_json)
+    elif page.form_variant_id:
+        variants = [(page.form_variant_id, page.in_stock)]
+    else:
+        variants = []
+    return ProductSnapshot(url, page.title, page.in_stock, variants, prices)
+
+def check_product_html(url):
+    """Check stock by scraping the product page HTML."""
+    return fetch_parsed(url, parse_product_page) or ProductSnapshot(url)
+
+def product_handle(url):
+    """Return the product handle from a product page URL."""
+    return url.split('?')[0].rstrip('/').rsplit('/', 1)[-1]
+
+def parse_collection_page(url, response):
+    """Return the product list from a collection products.json page, dropping entries without a handle and variants."""
+    try:
+        data = response.json()
+    except ValueError as e:
+        logging.warning(f"Invalid collection JSON for {url}: {e}")
+        return None
+    if not isinstance(data, dict) or not isinstance(data.get('products'), list):
+        logging.warning(f"Unexpected collection JSON for {url}")
+        return None
+    products = [
+        product for product in data['products']
+        if isinstance(product, dict) and isinstance(product.get('handle'), str) and isinstance(product.get('variants'), list)
+        and all(isinstance(variant, dict) and 'id' in variant for variant in product['variants'])
+    ]
+    if len(products) < len(data['products']):
+        logging.warning(f"Skipped {len(data['products']) - len(products)} malformed products in {url}")
+    return products
+
+def fetch_collection_index(storefront, collection):
+    """Build a product URL -> title/variant availability index from a collection's products.json pages."""
+    index = {}
+    for page in range(1, COLLECTION_MAX_PAGES + 1):
+        products = fetch_parsed(storefront.collection_url(collection, page, COLLECTION_PAGE_SIZE), parse_collection_page)
+        if products is None:
+            break
+        for product in products:
+            index[storefront.product_url(product['handle'])] = {
+                'title': product.get('title'),
+                'variants': get_variant_availability(product),
+                'prices': get_variant_prices(product)
+            }
+        if len(products) < COLLECTION_PAGE_SIZE:
+            break
+    logging.info(f"Indexed {len(index)} products from collection {collection} on {storefront.name}")
+    return index
+
+def check_product(url):
+    """Check a product's stock, preferring the product JSON over the HTML page."""
+    snapshot = None
+    if USE_PRODUCT_JSON:
+        snapshot = check_product_json(url)
+        code = getattr(fetch_status, 'code', None)
+        # Only fall back when the JSON is missing or malformed; after a 429, 5xx, network error or
+        # open circuit a second request would hit a host that needs backing off
+        if snapshot.name is None and code is not None and code != 429 and code < 500:
+            logging.info(f"Product JSON unavailable, falling back to HTML for {url}")
+            snapshot = None
+    snapshot = snapshot or check_product_html(url)
+    if snapshot.variant_id:
+        variant_id_cache[url] = snapshot.variant_id
+    POLLS.inc()
+    if snapshot.name is None:
+        POLL_ERRORS.inc()
+    else:
+        remember_metadata(snapshot)
+    return replace(
+        snapshot,
+        status=getattr(fetch_status, 'code', None),
+        retry_after=getattr(fetch_status, 'retry_after', None),
+        checked_at=time.monotonic()
+    )
+
+def remember_metadata(snapshot):
+    """Save a product's title and variants to the state store when they change or are going stale."""
+    cached = product_metadata.get(snapshot.url)
+    now = time.time()
+    if (cached and cached['title'] == snapshot.name and cached['variants'] == snapshot.variants
+            and now - cached['refreshed_at'] < METADATA_MAX_AGE / 2):
+        return
+    product_metadata[snapshot.url] = {
+        'title': snapshot.name,
+        'variant_id': snapshot.variant_id,
+        'variants': list(snapshot.variants),
+        'refreshed_at': now
+    }
+    state_store.save_metadata(snapshot.url, product_handle(snapshot.url), snapshot.name, snapshot.variant_id, snapshot.variants)
+
+def load_state():
+    """Restore purchases, product metadata and last stock states from the state store."""
+    state_store.open()
+    purchases = state_store.purchases()
+    notified_products.update(purchase['url'] for purchase in purchases)
+    metadata = state_store.metadata(max_age=METADATA_MAX_AGE)
+    for url, entry in metadata.items():
+        product_metadata[url] = entry
+        if entry['variant_id']:
+            variant_id_cache[url] = entry['variant_id']
+    stock_states = state_store.stock_states()
+    stock_index.seed(stock_states)
+    logging.info(f"Restored {len(purchases)} purchases, {len(metadata)} cached products and {len(stock_states)} stock states")
+    return stock_states
+
+notification_dispatcher = NotificationDispatcher(
+    SMTP_SERVER, SMTP_PORT, EMAIL, PASSWORD,
+    to_addrs=[address.strip() for address in (TO_EMAILS or "").split(",") if address.strip()],
+    use_tls=SMTP_STARTTLS, max_queue=EMAIL_QUEUE_SIZE, digest_window=EMAIL_DIGEST_WINDOW
+)
+
+def send_notification(url, product_name):
+    """Queue a restock email for the background sender."""
+    if not SMTP_SERVER:
+        return
+    notification_dispatcher.notify(url, product_name)
+
+
+def get_variant_id(page):
+    """Extract the variant ID from the product page"""
+    variant_id = page.variant_id
+    if variant_id is None:
+        logging.error("Variant ID not found in product JSON or form")
+    return variant_id
+
+
+def get_variant_id_html(url):
+    """Fetch the product page and extract the variant ID if the product is in stock"""
+    response = fetch_url(url)
+    if not response:
+        logging.error("Failed to fetch product page")
+        return None
+        
+    page = extract_page(response.content)
+    
+    # Check if product is in stock
+    if page.button_text is None:
+        logging.error("Add to cart button not found")
+        return None
+        
+    if not page.in_stock:
+        logging.info("Product is out of stock")
+        return None
+
+    return get_variant_id(page)
+
+
+def resolve_variant_id(url, snapshot=None):
+    """Find the variant to add to the cart, only going back to the store if the stock check didn't find one"""
+    variant_id = (snapshot.variant_id if snapshot else None) or variant_id_cache.get(url)
+    if variant_id:
+        logging.info("Using variant ID from stock check")
+        return variant_id
+
+    data = fetch_product_json(url) if USE_PRODUCT_JSON else None
+    if data:
+        variant_id = get_variant_id_from_json(data)
+        if not variant_id:
+            logging.info("Product is out of stock")
+        return variant_id
+    return get_variant_id_html(url)
+
+
+def add_items_to_cart(snapshots):
+    """Add one or more products to a single cart with one cart/add.js request.
+
+    Returns (checkout_url, added): added holds only the snapshots whose variant went into the cart.
+    """
+    with STAGE_SECONDS.time(stage="add_to_cart"):
+        checkout_url, added = post_cart_items(snapshots)
+    CART_ADDS.inc(result="success" if checkout_url else "failure")
+    if checkout_url:
+        detected_at = [snapshot.checked_at for snapshot in added if snapshot.checked_at is not None]
+        if detected_at:
+            DETECTION_TO_CART.observe(time.monotonic() - min(detected_at))
+    return checkout_url, added
+
+
+def post_cart_items(snapshots):
+    """Resolve each product's variant and POST them to its store's cart/add.js, returning (checkout_url, added snapshots)"""
+    storefront = storefront_for_url(snapshots[0].url)
+    try:
+        items = []
+        added = []
+        for snapshot in snapshots:
+            variant_id = resolve_variant_id(snapshot.url, snapshot)
+            if not variant_id:
+                logging.error(f"Could not find variant ID for {snapshot.url}")
+                continue
+            logging.info(f"Found variant ID: {variant_id}")
+            items.append({
+                "id": variant_id,
+                "quantity": 1
+            })
+            added.append(snapshot)
+        if not items:
+            return False, []
+
+        # Set up headers on top of the shared session defaults
+        headers = {
+            'Accept': 'application/json',
+            'Content-Type': 'application/json',
+            'X-Requested-With': 'XMLHttpRequest',
+            'Origin': storefront.base_url,
+            'Referer': snapshots[0].url
+        }
+        
+        # Prepare cart add request
+        cart_url = storefront.cart_url
+        payload = {"items": items}
+        
+        # Add to cart
+        cart_response = send_with_policy(
+            CART_POLICY, cart_url,
+            lambda timeout: get_session(cart_url).post(cart_url, json=payload, headers=headers, timeout=timeout)
+        )
+        
+        if cart_response.status_code == 200:
+            logging.info(f"Successfully added {len(items)} item(s) to cart")
+            # response_data = cart_response.json()
+            # logging.info(f"Cart response: {response_data}")
+            cart_cookie = cart_response.cookies.get('cart').split('%')[0]
+            if cart_cookie:
+                logging.info(f"Cart cookie: {cart_cookie}")
+            else:
+                logging.error("Cart cookie not found")
+            checkout_url = f"{storefront.checkout_base_url}{cart_cookie}"
+            return checkout_url, added
+        else:
+            logging.error(f"Failed to add to cart. Status: {cart_response.status_code}")
+            logging.error(f"Response: {cart_response.text}")
+            return False, []
+            
+    except Exception as e:
+        logging.error(f"Error in add_items_to_cart: {e}")
+        return False, []
+
+
+def check_products_concurrently(executor, urls):
+    """Check every product URL in parallel and report how long the sweep took."""
+    start = time.perf_counter()
+    futures = {executor.submit(profiler.profiled, check_product, url): url for url in urls}
+    results = {}
+    for future in as_completed(futures):
+        url = futures[future]
+        try:
+            results[url] = future.result()
+        except Exception as e:
+            logging.error(f"Error checking {url}: {e}")
+            POLL_ERRORS.inc()
+            results[url] = ProductSnapshot(url)
+    sweep_latency = time.perf_counter() - start
+    logging.info(f"Checked {len(urls)} products in {sweep_latency:.2f}s")
+    return results, sweep_latency
+
+
+def check_products_bulk(executor, urls):
+    """Answer stock checks from each storefront's collection listings, checking unlisted products individually."""
+    start = time.perf_counter()
+    listings = [
+        (storefront, collection)
+        for storefront, _ in group_by_storefront(urls, STOREFRONTS)
+        for collection in storefront.collections
+    ]
+    index = {}
+    futures = {executor.submit(profiler.profiled, fetch_collection_index, *listing): listing for listing in listings}
+    for future in as_completed(futures):
+        storefront, collection = futures[future]
+        try:
+            index.update(future.result())
+        except Exception as e:
+            # Its products are checked individually below
+            logging.error(f"Error indexing collection {collection} on {storefront.name}: {e}")
+            POLL_ERRORS.inc()
+
+    results = {}
+    missing = []
+    for url in urls:
+        product = index.get(url.split('?')[0].rstrip('/'))
+        if product:
+            in_stock = any(available for _, available in product['variants'])
+            results[url] = ProductSnapshot(
+                url, product['title'], in_stock, product['variants'], product['prices'], checked_at=time.monotonic()
+            )
+            if results[url].variant_id:
+                variant_id_cache[url] = results[url].variant_id
+            remember_metadata(results[url])
+        else:
+            missing.append(url)
+    if missing:
+        logging.info(f"{len(missing)} products not found in collections, checking individually")
+        missing_results, _ = check_products_concurrently(executor, missing)
+        results.update(missing_results)
+    sweep_latency = time.perf_counter() - start
+    logging.info(f"Checked {len(urls)} products from {len(listings)} collections in {sweep_latency:.2f}s")
+    return results, sweep_latency
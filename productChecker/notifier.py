@@ -0,0 +1,141 @@
+import logging
+import queue
+import smtplib
+import threading
+import time
+from email.message import EmailMessage
+
+
+class NotificationDispatcher:
+    """Sends restock emails from a background thread over one reused, authenticated SMTP connection.
+
+    Restocks queued within digest_window seconds of each other go out as one digest email.
+    """
+
+    def __init__(self, host, port, username=None, password=None, from_addr=None, to_addrs=(),
+                 use_tls=True, max_queue=100, digest_window=2.0, idle_timeout=120.0, smtp_class=smtplib.SMTP):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.from_addr = from_addr or username
+        self.to_addrs = list(to_addrs)
+        self.use_tls = use_tls
+        self.digest_window = digest_window
+        self.idle_timeout = idle_timeout
+        self.smtp_class = smtp_class
+        self.sent = 0
+        self.failed = 0
+        self.dropped = 0
+        self.send_latencies = []
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._server = None
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="notifier", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=10):
+        """Send anything still queued, then close the connection."""
+        self._queue.put(None)
+        if self._thread:
+            self._thread.join(timeout)
+
+    def notify(self, url, product_name):
+        """Queue a restock notification without blocking; returns False if the queue is full."""
+        try:
+            self._queue.put_nowait((url, product_name))
+            return True
+        except queue.Full:
+            self.dropped += 1
+            logging.warning(f"Notification queue full, dropped email for {product_name}")
+            return False
+
+    def stats(self):
+        latencies = self.send_latencies
+        return {
+            'sent': self.sent,
+            'failed': self.failed,
+            'dropped': self.dropped,
+            'queue_depth': self._queue.qsize(),
+            'last_send_latency': latencies[-1] if latencies else None,
+            'avg_send_latency': sum(latencies) / len(latencies) if latencies else None
+        }
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            try:
+                first = self._queue.get(timeout=self.idle_timeout)
+            except queue.Empty:
+                self._disconnect()
+                continue
+            if first is None:
+                break
+            restocks = [first]
+            deadline = time.monotonic() + self.digest_window
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    entry = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if entry is None:
+                    stopping = True
+                    break
+                restocks.append(entry)
+            self._send(self._build_message(restocks))
+        self._disconnect()
+
+    def _build_message(self, restocks):
+        message = EmailMessage()
+        if len(restocks) == 1:
+            url, product_name = restocks[0]
+            message['Subject'] = f"{product_name} is now in stock!"
+            message.set_content(f"The {product_name} is now in stock: {url}")
+        else:
+            message['Subject'] = f"{len(restocks)} products are now in stock!"
+            message.set_content("\n".join(f"{product_name}: {url}" for url, product_name in restocks))
+        message['From'] = self.from_addr
+        message['To'] = ", ".join(self.to_addrs)
+        return message
+
+    def _send(self, message):
+        start = time.perf_counter()
+        for attempt in range(2):
+            try:
+                if self._server is None:
+                    self._connect()
+                self._server.send_message(message, self.from_addr, self.to_addrs)
+                latency = time.perf_counter() - start
+                self.send_latencies = self.send_latencies[-99:] + [latency]
+                self.sent += 1
+                logging.info(f"Email sent: {message['Subject']} ({latency:.2f}s, {self._queue.qsize()} queued)")
+                return
+            except (smtplib.SMTPException, OSError) as e:
+                # The server may have dropped an idle connection; reconnect once and retry
+                logging.warning(f"Email send attempt {attempt + 1} failed: {e}")
+                self._disconnect()
+        self.failed += 1
+        logging.error(f"Failed to send email: {message['Subject']}")
+
+    def _connect(self):
+        server = self.smtp_class(self.host, self.port, timeout=30)
+        if self.use_tls:
+            server.starttls()
+        if self.username and self.password:
+            server.login(self.username, self.password)
+        self._server = server
+        logging.info(f"Connected to SMTP server {self.host}:{self.port}")
+
+    def _disconnect(self):
+        if self._server is None:
+            return
+        try:
+            self._server.quit()
+        except (smtplib.SMTPException, OSError):
+            pass
+        self._server = None
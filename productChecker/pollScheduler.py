@@ -0,0 +1,132 @@
+import heapq
+import logging
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from urllib.parse import urlsplit
+
+
+@dataclass(order=True)
+class ScheduledProduct:
+    next_due: float
+    url: str = field(compare=False)
+    base_interval: float = field(compare=False)
+    interval: float = field(compare=False)
+    failures: int = field(default=0, compare=False)
+    last_status: int = field(default=None, compare=False)
+
+
+class HostBudget:
+    """Token bucket limiting requests per second to one host."""
+
+    def __init__(self, requests_per_second, burst=None):
+        self.rate = requests_per_second
+        self.capacity = burst or max(1.0, requests_per_second)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+
+    def try_acquire(self, now):
+        if now < self.paused_until:
+            return False
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+    def seconds_until_available(self, now):
+        if now < self.paused_until:
+            return self.paused_until - now
+        return max(0.0, (1 - self.tokens) / self.rate)
+
+    def pause(self, seconds, now):
+        self.paused_until = max(self.paused_until, now + seconds)
+
+
+class PollScheduler:
+    """Priority queue of products keyed on next-due time, with per-product intervals and per-host budgets."""
+
+    def __init__(self, urls, interval=5.0, intervals=None, jitter=0.1, max_interval=300.0, requests_per_second=2.0,
+                 host_requests_per_second=None):
+        self.jitter = jitter
+        self.max_interval = max_interval
+        self.requests_per_second = requests_per_second
+        self.host_requests_per_second = host_requests_per_second or {}
+        self.budgets = {}
+        self._heap = []
+        self._in_flight = {}
+        self._lock = threading.Lock()
+        now = time.monotonic()
+        for url in urls:
+            base = (intervals or {}).get(url, interval)
+            heapq.heappush(self._heap, ScheduledProduct(now, url, base, base))
+
+    def due(self, now=None):
+        """Pop the products that are due and fit within their host's request budget."""
+        now = now or time.monotonic()
+        ready = []
+        deferred = []
+        with self._lock:
+            while self._heap and self._heap[0].next_due <= now:
+                product = heapq.heappop(self._heap)
+                if self._budget(product.url).try_acquire(now):
+                    ready.append(product)
+                else:
+                    deferred.append(product)
+            for product in deferred:
+                product.next_due = now + self._budget(product.url).seconds_until_available(now)
+                heapq.heappush(self._heap, product)
+            self._in_flight.update((product.url, product) for product in ready)
+        return [product.url for product in ready]
+
+    def seconds_until_next(self):
+        with self._lock:
+            if not self._heap:
+                return None
+            return max(0.0, self._heap[0].next_due - time.monotonic())
+
+    def record(self, url, status=None, retry_after=None):
+        """Reschedule a polled product, slowing down on errors, 429s, 5xxs and Retry-After."""
+        now = time.monotonic()
+        with self._lock:
+            product = self._in_flight.pop(url)
+            product.last_status = status
+            if status is not None and status < 400:
+                product.failures = 0
+                product.interval = product.base_interval
+            else:
+                product.failures += 1
+                product.interval = min(product.interval * 2, self.max_interval)
+                if status == 429 or (status is not None and status >= 500):
+                    wait = retry_after if retry_after is not None else product.interval
+                    self._budget(url).pause(wait, now)
+                    product.interval = max(product.interval, min(wait, self.max_interval))
+                    logging.warning(f"{urlsplit(url).netloc} answered {status}, backing off for {wait:.1f}s")
+            spread = product.interval * self.jitter
+            product.next_due = now + product.interval + random.uniform(-spread, spread)
+            heapq.heappush(self._heap, product)
+
+    def queue_state(self):
+        """Return the queue ordered by next-due time, for inspection."""
+        now = time.monotonic()
+        with self._lock:
+            products = sorted(self._heap)
+            return [
+                {
+                    'url': product.url,
+                    'due_in': round(product.next_due - now, 2),
+                    'interval': round(product.interval, 2),
+                    'failures': product.failures,
+                    'last_status': product.last_status
+                }
+                for product in products
+            ]
+
+    def _budget(self, url):
+        host = urlsplit(url).netloc
+        if host not in self.budgets:
+            self.budgets[host] = HostBudget(self.host_requests_per_second.get(host, self.requests_per_second))
+        return self.budgets[host]
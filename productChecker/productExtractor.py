@@ -0,0 +1,120 @@
+import json
+import logging
+from dataclasses import dataclass
+from html.parser import HTMLParser
+
+# Markup the stock checker reads from a product page
+TITLE_TAG = "h1"
+TITLE_CLASSES = {"product__title"}
+BUTTON_TAG = "button"
+BUTTON_CLASSES = {"product-form__submit", "button", "button--primary"}
+
+CHUNK_SIZE = 16 * 1024
+
+
+@dataclass
+class ProductPage:
+    """The parts of a product page needed to check stock and add to cart."""
+    title: str = None
+    button_text: str = None
+    product_json: dict = None
+    form_variant_id: str = None
+
+    @property
+    def in_stock(self):
+        return self.button_text is not None and "add to cart" in self.button_text.lower()
+
+    @property
+    def variant_id(self):
+        """Return the first available variant ID from the product JSON, falling back to the form input."""
+        if self.product_json and self.product_json.get('variants'):
+            for variant in self.product_json['variants']:
+                if variant.get('available'):
+                    return str(variant['id'])
+            return None
+        return self.form_variant_id
+
+
+class ProductPageParser(HTMLParser):
+    """Single-pass parser that only collects the title, cart button and product JSON."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.page = ProductPage()
+        self._capture = None
+        self._buffer = []
+
+    @property
+    def done(self):
+        page = self.page
+        return page.title is not None and page.button_text is not None and page.product_json is not None
+
+    def handle_starttag(self, tag, attrs):
+        if self._capture:
+            return
+        page = self.page
+        if tag == TITLE_TAG and page.title is None and TITLE_CLASSES <= _classes(attrs):
+            self._start_capture(tag)
+        elif tag == BUTTON_TAG and page.button_text is None and BUTTON_CLASSES <= _classes(attrs):
+            self._start_capture(tag)
+        elif tag == "script" and page.product_json is None and ('type', 'application/json') in attrs:
+            self._start_capture(tag)
+        elif tag == "input" and page.form_variant_id is None:
+            attributes = dict(attrs)
+            if attributes.get('name') == 'id' and attributes.get('value'):
+                page.form_variant_id = attributes['value']
+
+    def handle_endtag(self, tag):
+        if tag != self._capture:
+            return
+        text = "".join(self._buffer)
+        if tag == TITLE_TAG:
+            self.page.title = " ".join(text.split())
+        elif tag == BUTTON_TAG:
+            self.page.button_text = " ".join(text.split())
+        else:
+            self.page.product_json = _product_json(text)
+        self._capture = None
+        self._buffer = []
+
+    def handle_data(self, data):
+        if self._capture:
+            self._buffer.append(data)
+
+    def _start_capture(self, tag):
+        self._capture = tag
+        self._buffer = []
+
+
+def _classes(attrs):
+    for name, value in attrs:
+        if name == 'class' and value:
+            return set(value.split())
+    return set()
+
+
+def _product_json(text):
+    try:
+        data = json.loads(text)
+    except json.JSONDecodeError:
+        return None
+    if isinstance(data, dict) and 'variants' in data:
+        return data
+    return None
+
+
+def extract_product_page(content, chunk_size=CHUNK_SIZE):
+    """Extract a ProductPage from page HTML, stopping as soon as everything has been found."""
+    if isinstance(content, bytes):
+        content = content.decode('utf-8', errors='replace')
+    parser = ProductPageParser()
+    try:
+        for start in range(0, len(content), chunk_size):
+            parser.feed(content[start:start + chunk_size])
+            if parser.done:
+                break
+        else:
+            parser.close()
+    except Exception as e:
+        logging.warning(f"Error parsing product page: {e}")
+    return parser.page
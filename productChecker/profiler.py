@@ -0,0 +1,196 @@
+import cProfile
+import io
+import linecache
+import logging
+import os
+import pstats
+import signal
+import sys
+import threading
+import time
+import tracemalloc
+
+from .diagnostics import file_stamp
+
+# From Python 3.12 cProfile runs on sys.monitoring: one enabled profiler sees every thread and no second one can be enabled
+PROCESS_WIDE_PROFILER = sys.version_info >= (3, 12)
+
+
+class Profiler:
+    """cProfile and tracemalloc for the running bot, switched on and off without a restart.
+
+    While active, every call made through profiled() runs under its thread's own
+    cProfile profiler (on Python 3.12+ one profiler started by start() covers the
+    whole process instead), and tracemalloc records where memory is allocated. stop()
+    merges the per-thread stats and writes them with a memory snapshot compared
+    against the one taken at start(); snapshot() compares memory against the previous
+    snapshot without stopping. Files are timestamped and written to directory.
+    """
+
+    def __init__(self, directory, top=30, trace_frames=10):
+        self.directory = directory
+        self.top = top
+        self.trace_frames = trace_frames
+        self.started_at = None
+        self._profiles = []
+        self._local = threading.local()
+        self._memory_snapshot = None
+        self._started_tracing = False
+        self._lock = threading.Lock()
+
+    @property
+    def active(self):
+        return self.started_at is not None
+
+    def start(self):
+        """Begin profiling calls and tracing allocations; returns False if already running."""
+        with self._lock:
+            if self.active:
+                return False
+            self._profiles = []
+            self._local = threading.local()
+            # Leave tracemalloc running afterwards if something else (e.g. PYTHONTRACEMALLOC) started it
+            self._started_tracing = not tracemalloc.is_tracing()
+            if self._started_tracing:
+                tracemalloc.start(self.trace_frames)
+            self._memory_snapshot = tracemalloc.take_snapshot()
+            if PROCESS_WIDE_PROFILER:
+                profile = cProfile.Profile()
+                try:
+                    profile.enable()
+                    self._profiles.append(profile)
+                except ValueError as e:
+                    logging.warning(f"CPU profiling unavailable, tracing memory only: {e}")
+            self.started_at = time.time()
+        logging.info(f"Profiling started, results will be written to {self.directory}/")
+        return True
+
+    def stop(self):
+        """Stop profiling and write the call stats and memory comparison, returning the files written."""
+        with self._lock:
+            if not self.active:
+                return []
+            started_at, self.started_at = self.started_at, None
+            profiles, self._profiles = self._profiles, []
+            if PROCESS_WIDE_PROFILER:
+                for profile in profiles:
+                    profile.disable()
+        # Snapshot memory before merging stats so the report shows the bot's allocations, not the profiler's
+        paths = self.snapshot()
+        paths = self._write_stats(profiles, started_at) + paths
+        if self._started_tracing:
+            tracemalloc.stop()
+        self._memory_snapshot = None
+        return paths
+
+    def toggle(self):
+        """Start profiling if stopped, otherwise stop and write the results."""
+        if self.active:
+            return self.stop()
+        self.start()
+        return []
+
+    def snapshot(self):
+        """Write a memory snapshot and its growth since the previous one, returning the files written."""
+        if not tracemalloc.is_tracing():
+            return []
+        current = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, cProfile.__file__),
+            tracemalloc.Filter(False, pstats.__file__),
+            # Source lines cached while formatting earlier reports
+            tracemalloc.Filter(False, linecache.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>")
+        ))
+        previous, self._memory_snapshot = self._memory_snapshot, current
+        base = self._base_path("memory")
+        current.dump(f"{base}.tracemalloc")
+        with open(f"{base}.txt", "w") as f:
+            size, peak = tracemalloc.get_traced_memory()
+            f.write(f"Traced memory: {size / 1024 / 1024:.1f} MB (peak {peak / 1024 / 1024:.1f} MB)\n\n")
+            if previous is not None:
+                f.write("Largest growth since the previous snapshot:\n")
+                for stat in current.compare_to(previous, "lineno")[:self.top]:
+                    f.write(f"{stat}\n")
+                f.write("\n")
+            f.write("Largest allocations by line:\n")
+            for stat in current.statistics("lineno")[:self.top]:
+                f.write(f"{stat}\n")
+            f.write("\nLargest allocations by traceback:\n")
+            for stat in current.statistics("traceback")[:5]:
+                f.write(f"{stat}\n")
+                f.write("".join(f"    {line}\n" for line in stat.traceback.format()))
+        logging.info(f"Memory snapshot written to {base}.txt")
+        return [f"{base}.tracemalloc", f"{base}.txt"]
+
+    def status(self):
+        return {
+            'active': self.active,
+            'started_at': self.started_at,
+            'threads_profiled': len(self._profiles),
+            'traced_memory_mb': round(tracemalloc.get_traced_memory()[0] / 1024 / 1024, 1) if tracemalloc.is_tracing() else None
+        }
+
+    def profiled(self, function, *args, **kwargs):
+        """Call function, under the calling thread's profiler while profiling is active."""
+        if PROCESS_WIDE_PROFILER or not self.active or getattr(self._local, 'running', False):
+            return function(*args, **kwargs)
+        profile = self._thread_profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Another profiler owns this thread; run unprofiled rather than fail the poll
+            return function(*args, **kwargs)
+        self._local.running = True
+        try:
+            return function(*args, **kwargs)
+        finally:
+            profile.disable()
+            self._local.running = False
+
+    def install_signals(self, toggle_signal="SIGUSR1", snapshot_signal="SIGUSR2"):
+        """Toggle profiling on toggle_signal and take a memory snapshot on snapshot_signal, where the platform has them."""
+        for name, action in ((toggle_signal, self.toggle), (snapshot_signal, self.snapshot)):
+            signum = getattr(signal, name, None)
+            if signum is not None:
+                # Write files off the signal handler so the loop it interrupted carries on
+                signal.signal(signum, lambda *_, action=action: threading.Thread(target=self._run, args=(action,), daemon=True).start())
+
+    def _run(self, action):
+        try:
+            action()
+        except OSError as e:
+            logging.error(f"Failed to write profile: {e}")
+
+    def _thread_profile(self):
+        profile = getattr(self._local, 'profile', None)
+        if profile is None:
+            profile = cProfile.Profile()
+            self._local.profile = profile
+            with self._lock:
+                self._profiles.append(profile)
+        return profile
+
+    def _write_stats(self, profiles, started_at):
+        base = self._base_path("cpu")
+        if not profiles:
+            logging.info("Profiling stopped, no profiled calls were made")
+            return []
+        stats = pstats.Stats(profiles[0])
+        for profile in profiles[1:]:
+            stats.add(profile)
+        stats.dump_stats(f"{base}.prof")
+        report = io.StringIO()
+        threads = "all threads" if PROCESS_WIDE_PROFILER else f"{len(profiles)} threads"
+        report.write(f"Profiled {time.time() - started_at:.1f}s across {threads}\n")
+        stats.stream = report
+        stats.sort_stats("cumulative").print_stats(self.top)
+        stats.sort_stats("tottime").print_stats(self.top)
+        with open(f"{base}.txt", "w") as f:
+            f.write(report.getvalue())
+        logging.info(f"CPU profile written to {base}.txt (load {base}.prof with pstats or snakeviz)")
+        return [f"{base}.prof", f"{base}.txt"]
+
+    def _base_path(self, kind):
+        os.makedirs(self.directory, exist_ok=True)
+        return os.path.join(self.directory, f"{file_stamp(time.time())}-{os.getpid()}-{kind}")
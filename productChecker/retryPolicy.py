@@ -0,0 +1,132 @@
+import logging
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from urllib.parse import urlsplit
+
+import requests
+
+# Errors worth retrying: the request may succeed if sent again
+RETRYABLE_ERRORS = (
+    requests.exceptions.ConnectionError,
+    requests.exceptions.Timeout,
+    requests.exceptions.ChunkedEncodingError
+)
+
+
+class CircuitOpenError(requests.exceptions.RequestException):
+    """Raised instead of sending a request to a host whose circuit is open."""
+
+
+class CircuitBreaker:
+    """Per-host breaker that opens after consecutive failures and lets one trial through after a cooldown."""
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._hosts = {}
+        self._lock = threading.Lock()
+
+    def allow(self, host):
+        with self._lock:
+            state = self._hosts.get(host)
+            if not state or state['opened_at'] is None:
+                return True
+            now = time.monotonic()
+            if now - state['opened_at'] < self.reset_timeout:
+                return False
+            # Half-open: let one trial through and refuse everyone else until it succeeds or fails.
+            # A trial that never reports back (e.g. an unexpected error) is replaced after another cooldown.
+            if state['trial_at'] is not None and now - state['trial_at'] < self.reset_timeout:
+                return False
+            state['trial_at'] = now
+            return True
+
+    def record_success(self, host):
+        with self._lock:
+            self._hosts.pop(host, None)
+
+    def record_failure(self, host):
+        with self._lock:
+            state = self._hosts.setdefault(host, {'failures': 0, 'opened_at': None, 'trial_at': None})
+            if state['trial_at'] is not None:
+                # The trial failed: start a fresh cooldown
+                state['trial_at'] = None
+                state['opened_at'] = time.monotonic()
+                logging.warning(f"Circuit re-opened for {host} after a failed trial request")
+                return
+            state['failures'] += 1
+            if state['failures'] >= self.failure_threshold and state['opened_at'] is None:
+                state['opened_at'] = time.monotonic()
+                logging.warning(f"Circuit opened for {host} after {state['failures']} failures")
+
+    def state(self):
+        with self._lock:
+            return {host: ('open' if s['opened_at'] is not None else 'closed', s['failures']) for host, s in self._hosts.items()}
+
+
+@dataclass
+class RetryPolicy:
+    """Retry, backoff and deadline settings for one kind of request."""
+    name: str
+    max_attempts: int = 3
+    base_delay: float = 0.2
+    max_delay: float = 2.0
+    timeout: float = 10.0       # per attempt
+    deadline: float = 15.0      # for all attempts together, including backoff
+    retry_statuses: frozenset = frozenset({500, 502, 503, 504})
+    breaker: CircuitBreaker = field(default_factory=CircuitBreaker)
+
+    def backoff(self, attempt):
+        """Exponential backoff with full jitter."""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+
+def send_with_policy(policy, url, send):
+    """Call send(timeout=...) under a retry policy, returning the last response or raising the last error.
+
+    Retries connection errors, timeouts and the policy's retry statuses with
+    backoff (honouring Retry-After), never exceeding the policy deadline, and
+    stops with CircuitOpenError once the host's circuit opens.
+    """
+    host = urlsplit(url).netloc
+    if not policy.breaker.allow(host):
+        raise CircuitOpenError(f"Circuit open for {host}, skipping {policy.name} request")
+
+    deadline = time.monotonic() + policy.deadline
+    response = None
+    error = None
+    for attempt in range(policy.max_attempts):
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        # A failure may have opened the circuit (or re-opened it after a failed trial), so ask again before retrying
+        if attempt and not policy.breaker.allow(host):
+            raise CircuitOpenError(f"Circuit open for {host}, not retrying {policy.name} request")
+        try:
+            response = send(timeout=min(policy.timeout, remaining))
+            error = None
+        except RETRYABLE_ERRORS as e:
+            response = None
+            error = e
+        if response is not None and response.status_code not in policy.retry_statuses:
+            policy.breaker.record_success(host)
+            return response
+        policy.breaker.record_failure(host)
+
+        delay = policy.backoff(attempt)
+        if response is not None:
+            retry_after = response.headers.get('Retry-After', '')
+            if retry_after.isdigit():
+                delay = max(delay, float(retry_after))
+        reason = error or f"status {response.status_code}"
+        if attempt + 1 >= policy.max_attempts or time.monotonic() + delay >= deadline:
+            logging.warning(f"{policy.name} request to {url} failed ({reason}), giving up")
+            break
+        logging.warning(f"{policy.name} request to {url} failed ({reason}), retrying in {delay:.2f}s")
+        time.sleep(delay)
+
+    if response is not None:
+        return response
+    raise error or requests.exceptions.Timeout(f"{policy.name} deadline exceeded for {url}")
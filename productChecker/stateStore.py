@@ -0,0 +1,106 @@
+import json
+import logging
+import sqlite3
+import threading
+import time
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS purchases (
+    url TEXT NOT NULL,
+    name TEXT,
+    variant_id TEXT,
+    checkout_url TEXT,
+    purchased_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS stock_state (
+    url TEXT PRIMARY KEY,
+    in_stock INTEGER NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS product_metadata (
+    url TEXT PRIMARY KEY,
+    handle TEXT,
+    title TEXT,
+    variant_id TEXT,
+    variants TEXT,
+    refreshed_at REAL NOT NULL
+);
+"""
+
+
+class StateStore:
+    """SQLite store for completed purchases, last-seen stock states and cached product metadata.
+
+    Nothing is kept until open() is called, so the checker also runs without a state file.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def open(self):
+        start = time.perf_counter()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        logging.info(f"Opened state store {self.path} in {time.perf_counter() - start:.3f}s")
+
+    def close(self):
+        with self._lock:
+            if self._conn:
+                self._conn.close()
+                self._conn = None
+
+    def _execute(self, sql, params=()):
+        with self._lock:
+            if self._conn is None:
+                return []
+            return self._conn.execute(sql, params).fetchall()
+
+    def record_purchase(self, url, name, variant_id=None, checkout_url=None):
+        self._execute(
+            "INSERT INTO purchases (url, name, variant_id, checkout_url, purchased_at) VALUES (?, ?, ?, ?, ?)",
+            (url, name, variant_id, checkout_url, time.time())
+        )
+
+    def purchases(self):
+        rows = self._execute("SELECT url, name, variant_id, checkout_url, purchased_at FROM purchases ORDER BY purchased_at")
+        return [
+            {'url': url, 'name': name, 'variant_id': variant_id, 'checkout_url': checkout_url, 'purchased_at': purchased_at}
+            for url, name, variant_id, checkout_url, purchased_at in rows
+        ]
+
+    def save_stock_state(self, url, in_stock):
+        self._execute(
+            "INSERT OR REPLACE INTO stock_state (url, in_stock, updated_at) VALUES (?, ?, ?)",
+            (url, int(in_stock), time.time())
+        )
+
+    def stock_states(self):
+        return {url: bool(in_stock) for url, in_stock in self._execute("SELECT url, in_stock FROM stock_state")}
+
+    def save_metadata(self, url, handle, title, variant_id, variants):
+        self._execute(
+            "INSERT OR REPLACE INTO product_metadata (url, handle, title, variant_id, variants, refreshed_at) VALUES (?, ?, ?, ?, ?, ?)",
+            (url, handle, title, variant_id, json.dumps(variants), time.time())
+        )
+
+    def metadata(self, max_age=None):
+        """Return url -> cached title/variant metadata, leaving out entries older than max_age seconds."""
+        oldest = time.time() - max_age if max_age else 0
+        rows = self._execute(
+            "SELECT url, handle, title, variant_id, variants, refreshed_at FROM product_metadata WHERE refreshed_at >= ?",
+            (oldest,)
+        )
+        return {
+            url: {
+                'handle': handle,
+                'title': title,
+                'variant_id': variant_id,
+                'variants': [tuple(variant) for variant in json.loads(variants or "[]")],
+                'refreshed_at': refreshed_at
+            }
+            for url, handle, title, variant_id, variants, refreshed_at in rows
+        }
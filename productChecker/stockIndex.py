@@ -0,0 +1,78 @@
+import threading
+from dataclasses import dataclass
+
+
+@dataclass
+class StockEvent:
+    """A change seen by the stock index. variant_id is None for product-level events."""
+    kind: str  # "in_stock", "out_of_stock" or "new_variant"
+    url: str
+    name: str = None
+    variant_id: str = None
+    available: bool = None
+    price: object = None
+    previous: bool = None  # the product's stock state before this event, None if never known
+    snapshot: object = None
+
+
+class StockIndex:
+    """In-memory index of product -> variant -> availability and price, updated from each poll.
+
+    update() compares a fresh snapshot with what the index already holds and returns
+    only the transitions, so consumers do work per change rather than per product
+    polled. The first time a product is seen in stock this run an in_stock event is
+    always returned, with previous set from the seeded state, so checkout can pick up
+    products that were already in stock before a restart.
+    """
+
+    def __init__(self):
+        self._products = {}  # url -> {'in_stock', 'seen', 'variants': {variant_id: (available, price)}}
+        self._lock = threading.Lock()
+
+    def seed(self, stock_states):
+        """Start from persisted product stock states (url -> in_stock)."""
+        with self._lock:
+            for url, in_stock in stock_states.items():
+                self._products.setdefault(url, {'in_stock': in_stock, 'seen': False, 'variants': {}})
+
+    def update(self, snapshot):
+        """Apply one stock check and return the events it caused."""
+        if snapshot.in_stock is None:
+            return []
+        events = []
+        with self._lock:
+            product = self._products.setdefault(snapshot.url, {'in_stock': None, 'seen': False, 'variants': {}})
+            previous = product['in_stock']
+            known = product['variants']
+            variants = {variant_id: (available, snapshot.prices.get(variant_id)) for variant_id, available in snapshot.variants}
+            if product['seen']:
+                for variant_id, (available, price) in variants.items():
+                    if variant_id not in known:
+                        kind = "new_variant"
+                    elif known[variant_id][0] != available and len(variants) > 1:
+                        # A single variant's changes are the product-level event below
+                        kind = "in_stock" if available else "out_of_stock"
+                    else:
+                        continue
+                    events.append(StockEvent(kind, snapshot.url, snapshot.name, variant_id, available, price, previous, snapshot))
+            product['variants'] = variants
+            product['in_stock'] = snapshot.in_stock
+            first_seen = not product['seen']
+            product['seen'] = True
+        if previous != snapshot.in_stock or (first_seen and snapshot.in_stock):
+            events.append(StockEvent(
+                "in_stock" if snapshot.in_stock else "out_of_stock", snapshot.url, snapshot.name,
+                available=snapshot.in_stock, previous=previous, snapshot=snapshot
+            ))
+        return events
+
+    def counts(self):
+        """Return how many products and variants are indexed and how many of each are in stock."""
+        with self._lock:
+            products = list(self._products.values())
+            return {
+                'products': len(products),
+                'products_in_stock': sum(1 for product in products if product['in_stock']),
+                'variants': sum(len(product['variants']) for product in products),
+                'variants_in_stock': sum(available for product in products for available, _ in product['variants'].values())
+            }
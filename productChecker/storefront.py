@@ -0,0 +1,87 @@
+from dataclasses import dataclass, field
+from urllib.parse import urlsplit
+
+
+@dataclass
+class Storefront:
+    """One regional store: its URLs, watched products, request budget and checkout profile."""
+    name: str
+    base_url: str
+    handles: list
+    requests_per_second: float = 5.0
+    pool_size: int = 16
+    accept_language: str = None
+    collections: list = field(default_factory=list)
+    shipping_info: dict = field(default_factory=dict)
+    payment_info: dict = field(default_factory=dict)
+
+    def __post_init__(self):
+        self.base_url = self.base_url.rstrip("/")
+
+    @property
+    def host(self):
+        return urlsplit(self.base_url).netloc
+
+    @property
+    def checkout_base_url(self):
+        return f"{self.base_url}/checkouts/cn/"
+
+    @property
+    def cart_url(self):
+        return f"{self.base_url}/cart/add.js"
+
+    @property
+    def product_urls(self):
+        return [self.product_url(handle) for handle in self.handles]
+
+    def product_url(self, handle):
+        return f"{self.base_url}/products/{handle}"
+
+    def collection_url(self, collection, page, limit):
+        return f"{self.base_url}/collections/{collection}/products.json?limit={limit}&page={page}"
+
+    def headers(self):
+        """Request headers this store's session sends on top of the defaults."""
+        return {'Accept-Language': self.accept_language} if self.accept_language else {}
+
+
+def storefront_env(environ, name, key, default=None):
+    """Read STORE_<NAME>_<KEY> from an environment mapping."""
+    return environ.get(f"STORE_{name.upper()}_{key}", default)
+
+
+def storefront_from_env(environ, name, defaults):
+    """Build a storefront from STORE_<NAME>_* variables, taking anything unset from defaults."""
+    def read(key, default):
+        return storefront_env(environ, name, key, default)
+
+    handles = read("PRODUCTS", None)
+    collections = read("COLLECTIONS", None)
+    shipping_info = dict(defaults.shipping_info)
+    for field_name in shipping_info:
+        shipping_info[field_name] = read(f"SHIPPING_{field_name.upper()}", shipping_info[field_name])
+    return Storefront(
+        name=name,
+        base_url=read("URL", None) or defaults.base_url,
+        handles=[handle.strip() for handle in handles.split(",") if handle.strip()] if handles else list(defaults.handles),
+        requests_per_second=float(read("REQUESTS_PER_SECOND", defaults.requests_per_second)),
+        pool_size=int(read("POOL_SIZE", defaults.pool_size)),
+        accept_language=read("ACCEPT_LANGUAGE", defaults.accept_language),
+        collections=[name.strip() for name in collections.split(",") if name.strip()] if collections else [],
+        shipping_info=shipping_info,
+        payment_info=dict(defaults.payment_info)
+    )
+
+
+def storefronts_by_host(storefronts):
+    return {storefront.host: storefront for storefront in storefronts}
+
+
+def group_by_storefront(items, storefronts, url=lambda item: item):
+    """Split items into per-storefront lists, keeping their order; unknown hosts go to the first storefront."""
+    hosts = storefronts_by_host(storefronts)
+    groups = {}
+    for item in items:
+        storefront = hosts.get(urlsplit(url(item)).netloc, storefronts[0])
+        groups.setdefault(storefront.name, (storefront, []))[1].append(item)
+    return list(groups.values())